@@ -0,0 +1,137 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+"""
+
+import os
+import signal
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from catalog import compile_catalog
+from catalog_loader import load_course_dict
+from course_scheduler import course_scheduler
+from search_memo import SubplanCache
+
+# Result of one planning task. plan is the course_scheduler output, or None when error says why the task failed.
+BatchResult = namedtuple('BatchResult', 'index, plan, error')
+
+# Compiled catalog of the current worker process, set once by init_worker
+worker_catalog = None
+# SubplanCache shared by the tasks of the current worker process, None when sub-plans aren't shared
+worker_subplans = None
+
+
+class PlanningTimeout(Exception):
+    """Raised inside a worker when a task runs longer than the batch timeout."""
+
+
+def init_worker(catalog_source, share_subplans=False):
+    """
+    Loads and compiles the batch's catalog once per worker process.
+
+    :param catalog_source: Path to a catalog xlsx file or a course catalog dictionary
+    :param share_subplans: True to give the worker a SubplanCache for all of its tasks
+    """
+    global worker_catalog, worker_subplans
+    course_descriptions = load_course_dict(catalog_source) if isinstance(catalog_source, str) else catalog_source
+    worker_catalog = compile_catalog(course_descriptions)
+    worker_subplans = SubplanCache() if share_subplans else None
+
+
+def raise_timeout(signum, frame):
+    raise PlanningTimeout()
+
+
+def plan_task(task, timeout):
+    """
+    Plans one (goal_conditions, initial_state) pair with the worker's catalog. Errors are returned rather than raised
+    so that one bad task doesn't take down the batch.
+
+    :return: (plan, error) where error is None on success
+    """
+    goal_conditions, initial_state = task
+    use_alarm = timeout is not None and hasattr(signal, 'setitimer')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return course_scheduler(worker_catalog, goal_conditions, initial_state, subplans=worker_subplans), None
+    except PlanningTimeout:
+        return None, 'timed out after ' + str(timeout) + ' seconds'
+    except Exception as error:
+        return None, repr(error)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def schedule_batch(catalog_source, tasks, workers=None, timeout=None, share_subplans=False):
+    """
+    Plans many students against the same catalog on a pool of worker processes. Each worker loads and compiles the
+    catalog once and then plans every task it is given with it. Plans are yielded in the order of tasks as soon as
+    they and every task before them are done, and at most a few tasks per worker are queued at a time, so tasks can
+    be a lazy iterable of any length.
+
+    :param catalog_source: Path to a catalog xlsx file or a course catalog dictionary, @see course_scheduler
+    :param tasks: Iterable of (goal_conditions, initial_state) pairs, @see course_scheduler
+    :param workers: Number of worker processes, defaults to the number of CPUs
+    :param timeout: Seconds a single task may run before it is reported as timed out, None for no limit. Only
+     enforced where the platform supports interval timers.
+    :param share_subplans: True to let the tasks of a worker reuse each other's solved prerequisites (@see
+     course_scheduler). Plans then depend on which tasks ran before them on the same worker.
+    :return: Generator of BatchResult, one per task in order
+    """
+    workers = workers or os.cpu_count() or 1
+    window = 4 * workers
+    initargs = (catalog_source, share_subplans)
+    executor = ProcessPoolExecutor(workers, initializer=init_worker, initargs=initargs)
+    pending = deque()
+    try:
+        for index, task in enumerate(tasks):
+            pending.append((index, task, executor.submit(plan_task, task, timeout)))
+            while len(pending) >= window:
+                result, executor = collect(pending, executor, initargs, workers, timeout)
+                yield result
+        while pending:
+            result, executor = collect(pending, executor, initargs, workers, timeout)
+            yield result
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def collect(pending, executor, initargs, workers, timeout):
+    """
+    Waits for the oldest pending task. A dying worker breaks the whole pool, so every pending task that wasn't done is
+    submitted again to a new pool, and the oldest one is run again in a pool of its own. It is only reported as failed
+    if it breaks that pool too, otherwise the task that crashed breaks the new pool and is found the same way later.
+
+    :param initargs: Arguments of init_worker for the new pools
+    :return: (BatchResult of the oldest task, executor to use from now on)
+    """
+    index, task, future = pending.popleft()
+    try:
+        plan, error = future.result()
+        return BatchResult(index, plan, error), executor
+    except BrokenProcessPool:
+        executor.shutdown(cancel_futures=True)
+        executor = ProcessPoolExecutor(workers, initializer=init_worker, initargs=initargs)
+        for position, (other_index, other_task, other_future) in enumerate(pending):
+            if other_future.cancelled() or not other_future.done() or other_future.exception() is not None:
+                pending[position] = (other_index, other_task, executor.submit(plan_task, other_task, timeout))
+        return run_alone(index, task, initargs, timeout), executor
+
+
+def run_alone(index, task, initargs, timeout):
+    """
+    Plans a task in a pool with a single worker, so that a crash can only come from the task itself.
+
+    :return: BatchResult of the task
+    """
+    with ProcessPoolExecutor(1, initializer=init_worker, initargs=initargs) as executor:
+        try:
+            plan, error = executor.submit(plan_task, task, timeout).result()
+            return BatchResult(index, plan, error)
+        except BrokenProcessPool as error:
+            return BatchResult(index, None, repr(error))
@@ -0,0 +1,239 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+
+    Benchmarks of the scheduler on synthetic catalogs.
+
+    "python3 benchmark.py" runs every scenario and compares the timings with the saved baseline, if there is one.
+    "python3 benchmark.py --record" saves the timings as the new baseline.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from openpyxl import Workbook
+
+from catalog import compile_catalog
+from catalog_loader import load_course_dict
+from course_scheduler import SearchContext, course_scheduler, search_depths
+from schedule import NUM_SEMESTERS, Course, CourseInfo, Schedule
+from search_memo import NogoodTable
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'benchmark_baseline.json')
+GOAL = Course('SYN', 'major')
+
+# Name (key) to generate_catalog arguments (value) of every scenario. Each major has to be plannable by
+# course_scheduler, which places every prerequisite as early as it can, so the scenarios that need more courses per
+# requirement have fewer requirements to leave it room.
+SCENARIOS = {
+    'small': dict(num_courses=200),
+    'medium': dict(num_courses=1000, alternatives=3),
+    'large': dict(num_courses=5000, alternatives=3, elective_groups=(4,), requirements=4),
+    'deep_chains': dict(num_courses=1000, chain_depth=7, elective_groups=(2,), requirements=4),
+    'wide_or': dict(num_courses=1000, alternatives=8),
+    'wide_and': dict(num_courses=1000, alternative_size=2, requirements=2),
+    'many_electives': dict(num_courses=1000, elective_groups=(2, 2, 2, 2, 2, 2), elective_choices=4, requirements=4),
+    'term_restricted': dict(num_courses=1000, fall_only=0.3, spring_only=0.3, elective_groups=(4,), requirements=5),
+    'credit_mix': dict(num_courses=1000, credit_mix=((1, 0.3), (2, 0.2), (3, 0.3), (4, 0.2))),
+}
+
+
+def generate_catalog(num_courses, alternatives=2, alternative_size=1, chain_depth=4, elective_groups=(4, 4),
+                     elective_choices=6, fall_only=0.05, spring_only=0.05, credit_mix=((3, 0.8), (4, 0.1), (1, 0.1)),
+                     requirements=6, seed=0):
+    """
+    Generates a catalog in the same form as create_course_dict, with a ('SYN', 'major') goal.
+
+    Courses are spread evenly over chain_depth levels and every course above the first level has prerequisite
+    alternatives made of courses from the level below it. The major requires courses from the top levels and the
+    electives of every elective group.
+
+    :param num_courses: Number of credited courses
+    :param alternatives: Number of prerequisite alternatives of a course above the first level
+    :param alternative_size: Number of courses in each prerequisite alternative
+    :param chain_depth: Number of levels, which is the longest prerequisite chain
+    :param elective_groups: Size of each group of electives that share their prerequisites
+    :param elective_choices: Number of courses that can fulfill the electives of a group
+    :param fall_only: Share of courses only offered in the fall
+    :param spring_only: Share of courses only offered in the spring
+    :param credit_mix: (credits, weight) pairs the credits of each course are picked from
+    :param requirements: Number of credited courses the major requires directly
+    :param seed: Seed of the random generator, the same arguments always give the same catalog
+    :return: Dictionary of Course (key) to CourseInfo (value)
+    """
+    rng = random.Random(seed)
+    credit_values = [credits for credits, _ in credit_mix]
+    credit_weights = [weight for _, weight in credit_mix]
+
+    levels = [[] for _ in range(chain_depth)]
+    for index in range(num_courses):
+        level = index * chain_depth // num_courses
+        levels[level].append(Course('SYN', str(1000 * (level + 1) + len(levels[level]))))
+
+    catalog = {}
+    for level, courses in enumerate(levels):
+        for course in courses:
+            term_roll = rng.random()
+            terms = ('Fall',) if term_roll < fall_only else \
+                ('Spring',) if term_roll < fall_only + spring_only else ('Spring', 'Fall')
+            prereqs = ()
+            if level > 0:
+                below = levels[level - 1]
+                prereqs = tuple(tuple(rng.sample(below, min(alternative_size, len(below))))
+                                for _ in range(alternatives))
+            credits = str(rng.choices(credit_values, credit_weights)[0])
+            catalog[course] = CourseInfo(credits, terms, prereqs)
+
+    goal_prereqs = []
+    top_courses = [course for courses in levels[-2:] for course in courses]
+    goal_prereqs.extend(rng.sample(top_courses, min(requirements, len(top_courses))))
+
+    # Groups get separate courses to choose from, since a course taken for one elective can't fulfill another one
+    choices = levels[0] + (levels[1] if chain_depth > 1 else [])
+    rng.shuffle(choices)
+    for group, size in enumerate(elective_groups):
+        group_choices = choices[group * elective_choices:(group + 1) * elective_choices]
+        info = CourseInfo('0', ('Spring', 'Fall'), tuple((course,) for course in group_choices))
+        for index in range(size):
+            elective = Course('SYN', 'elective' + str(group) + '_' + str(index))
+            catalog[elective] = info
+            goal_prereqs.append(elective)
+
+    catalog[GOAL] = CourseInfo('0', ('Spring', 'Fall'), (tuple(goal_prereqs),))
+    return catalog
+
+
+def write_workbook(catalog, file_path):
+    """Writes a catalog into a 'catalog' sheet laid out the way create_course_dict reads it."""
+    wb = Workbook()
+    sheet = wb.active
+    sheet.title = 'catalog'
+    for course, info in catalog.items():
+        prereqs = ', '.join(' '.join(program + designation for program, designation in alternative)
+                            for alternative in info.prereqs)
+        sheet.append([course.program, course.designation, info.credits, ' '.join(info.terms), prereqs or None])
+    wb.save(file_path)
+
+
+def timed(function, *args):
+    """:return: (seconds function took, function's return value)"""
+    start = time.perf_counter()
+    value = function(*args)
+    return time.perf_counter() - start, value
+
+
+def run_scenario(arguments, directory):
+    """
+    Times each stage of planning the major of a generated catalog: loading and compiling it, making the Schedule,
+    which analyzes the prerequisites of the catalog (@see prereq_analysis.py), searching the depths the way
+    course_scheduler does and filling the semesters of the plan found. plan is course_scheduler itself, timed after
+    the other stages, so it reuses the prerequisite analysis the way every student but the first of a catalog does.
+
+    :return: Dictionary of stage name to seconds, plus the number of courses planned. Error if no plan is found.
+    """
+    catalog = generate_catalog(**arguments)
+    file_path = os.path.join(directory, 'catalog.xlsx')
+    write_workbook(catalog, file_path)
+    cache_dir = os.path.join(directory, 'cache')
+
+    timings = {}
+    timings['load_cold'], _ = timed(load_course_dict, file_path, cache_dir)
+    timings['load_warm'], loaded = timed(load_course_dict, file_path, cache_dir)
+    timings['compile'], compiled = timed(compile_catalog, loaded)
+    timings['schedule'], schedule = timed(Schedule, compiled, [], [GOAL])
+
+    depths = range(max(schedule.min_semesters(), 1), NUM_SEMESTERS + 1)
+    timings['search'], (best_schedule, _) = timed(search_depths, schedule, depths, schedule.min_courses_scheduled(),
+                                                  SearchContext(NogoodTable()))
+    if best_schedule is None:
+        raise ValueError('no plan found for ' + str(arguments))
+    schedule.restore(best_schedule)
+    schedule.max_semester = NUM_SEMESTERS
+    timings['fill'], _ = timed(schedule.fill_semesters)
+
+    timings['plan'], plan = timed(course_scheduler, compiled, [GOAL], [])
+    if not plan:
+        raise ValueError('course_scheduler found no plan for ' + str(arguments))
+    timings['courses_planned'] = len(plan)
+    return timings
+
+
+def run_benchmarks(scenarios, repeat):
+    """
+    Runs every scenario repeat times and keeps the fastest time of each stage.
+
+    :return: Dictionary of scenario name to its timings (@see run_scenario)
+    """
+    results = {}
+    for name, arguments in scenarios.items():
+        best = None
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as directory:
+                timings = run_scenario(arguments, directory)
+            best = timings if best is None else {stage: min(best[stage], timings[stage]) for stage in timings}
+        results[name] = best
+    return results
+
+
+def find_regressions(results, baseline, tolerance, min_seconds):
+    """
+    :param tolerance: Allowed slowdown as a fraction of the baseline time, e.g. 0.25 for 25%
+    :param min_seconds: Slowdowns smaller than this many seconds are ignored as noise
+    :return: List of (scenario, stage, baseline seconds, current seconds) for every stage that got slower
+    """
+    regressions = []
+    for name, timings in results.items():
+        for stage, seconds in timings.items():
+            if stage == 'courses_planned' or stage not in baseline.get(name, {}):
+                continue
+            previous = baseline[name][stage]
+            if seconds > previous * (1 + tolerance) and seconds - previous > min_seconds:
+                regressions.append((name, stage, previous, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the scheduler on synthetic catalogs.')
+    parser.add_argument('scenarios', nargs='*', help='scenarios to run, all of them by default: ' +
+                                                     ', '.join(SCENARIOS))
+    parser.add_argument('--record', action='store_true', help='save the results as the new baseline')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline file to compare with or record to')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per scenario, the fastest one is kept')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown over the baseline')
+    parser.add_argument('--min-seconds', type=float, default=0.02, help='slowdowns below this are ignored')
+    args = parser.parse_args()
+
+    scenarios = {name: SCENARIOS[name] for name in args.scenarios or SCENARIOS}
+    results = run_benchmarks(scenarios, args.repeat)
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.record:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print('Baseline saved to ' + args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('No baseline at ' + args.baseline + ', run with --record to save one')
+        return 0
+
+    with open(args.baseline) as file:
+        regressions = find_regressions(results, json.load(file), args.tolerance, args.min_seconds)
+    for name, stage, previous, seconds in regressions:
+        print('REGRESSION ' + name + ' ' + stage + ': ' + '%.4fs' % previous + ' -> ' + '%.4fs' % seconds)
+    print(len(regressions), ' Regressions found.')
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+"""
+
+# Bit used for each term in a course's offered-terms mask. Bit positions follow the season index used by schedule.py
+# (semester % 2), so a course is offered in a semester when terms >> (semester % 2) & 1 is set.
+term_bits = {'Spring': 1 << 0, 'Fall': 1 << 1}
+
+
+def bit_indices(mask):
+    """
+    Iterates over the indexes of the set bits of an integer, lowest first.
+
+    :param mask: Bitset of course ids
+    :return: Generator of course ids in the bitset
+    """
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+def terms_to_mask(terms):
+    """
+    :param terms: Iterable of term names as given in the catalog, e.g. ('Spring', 'Fall')
+    :return: Bitmask of the terms the course can be scheduled in. Unknown terms (e.g. 'Summer') are ignored.
+    """
+    mask = 0
+    for term in terms or ():
+        mask |= term_bits.get(term, 0)
+    return mask
+
+
+def find_elective_groups(catalog):
+    """
+    Find and store electives that share prerequisites. This is a special case of high-level requirements. Since in
+    normal credited courses one course can fulfill unlimited requirements but in electives one course can fulfill
+    one requirement in the same group.
+
+    :param catalog: Dictionary holding all Course (key) to CourseInfo (value) information. See schedule.py for
+     definition of each.
+    :return: (List of groups of electives that share the same prerequisites. Ex group: [(CS, open1), (CS, open2)...],
+     Dictionary of every elective Course (key) to the index of its group (value))
+    """
+    reverse_catalog = {}
+    for key in catalog:
+        if catalog[key].credits == '0':
+            if catalog[key] in reverse_catalog:
+                reverse_catalog[catalog[key]].append(key)
+            else:
+                reverse_catalog[catalog[key]] = [key]
+
+    groups = []
+    group_of = {}
+    for key in reverse_catalog:
+        if len(reverse_catalog[key]) > 1:
+            for elective in reverse_catalog[key]:
+                group_of[elective] = len(groups)
+            groups.append(reverse_catalog[key])
+
+    return groups, group_of
+
+
+def compile_catalog(course_descriptions):
+    """
+    Compiles a course catalog unless it is already compiled.
+
+    :param course_descriptions: Dictionary of Course (key) to CourseInfo (value) or a CompiledCatalog
+    :return: CompiledCatalog for the given catalog
+    """
+    if isinstance(course_descriptions, CompiledCatalog):
+        return course_descriptions
+    return CompiledCatalog(course_descriptions)
+
+
+class CompiledCatalog:
+    """
+        Integer-indexed form of a course catalog. Every course gets a dense id in catalog order, so that course
+        information can be stored in lists and sets of courses can be stored as integer bitsets where bit i stands for
+        the course with id i.
+
+        Courses that are only mentioned as prerequisites also get an id. They have no credits, are never offered and
+        have no prerequisites, so they can never be scheduled.
+    """
+
+    def __init__(self, course_descriptions):
+        # Original catalog dictionary, Course (key) to CourseInfo (value)
+        self.descriptions = course_descriptions
+        # Course for each id
+        self.courses = []
+        # Id for each Course
+        self.ids = {}
+
+        for course in course_descriptions:
+            self.__intern(course)
+        for info in course_descriptions.values():
+            for prerequisites in info.prereqs:
+                for course in prerequisites:
+                    self.__intern(course)
+
+        size = len(self.courses)
+        # Number of credits of each course as an integer
+        self.credits = [0] * size
+        # Bitmask of the terms (@see term_bits) each course is offered in
+        self.terms = [0] * size
+        # Tuple of prerequisite alternatives of each course, each alternative is a bitset of course ids
+        self.prereqs = [()] * size
+
+        for course, info in course_descriptions.items():
+            course_id = self.ids[course]
+            self.credits[course_id] = int(info.credits)
+            self.terms[course_id] = terms_to_mask(info.terms)
+            self.prereqs[course_id] = tuple(self.to_mask(prerequisites) for prerequisites in info.prereqs)
+
+        # Courses that have each course in one of their prerequisite alternatives
+        self.dependents = [[] for _ in range(size)]
+        for course_id, possible_prerequisites in enumerate(self.prereqs):
+            union = 0
+            for prerequisites in possible_prerequisites:
+                union |= prerequisites
+            for prereq in bit_indices(union):
+                self.dependents[prereq].append(course_id)
+
+        # Groups of high-level electives that share prerequisites, as lists of course ids (@see find_elective_groups)
+        groups, group_of = find_elective_groups(course_descriptions)
+        self.elective_groups = [[self.ids[course] for course in group] for group in groups]
+        # Index of the elective group of each course, None for courses that aren't electives
+        self.elective_group_of = [None] * size
+        for course, index in group_of.items():
+            self.elective_group_of[self.ids[course]] = index
+
+        # PrereqAnalysis shared by every Schedule using this catalog, created by the first one (@see prereq_analysis.py)
+        self.analysis = None
+
+    def __intern(self, course):
+        if course not in self.ids:
+            self.ids[course] = len(self.courses)
+            self.courses.append(course)
+
+    def __len__(self):
+        return len(self.courses)
+
+    def to_mask(self, courses):
+        """
+        :param courses: Iterable of Course keys
+        :return: Bitset of the ids of the given courses
+        """
+        mask = 0
+        for course in courses:
+            mask |= 1 << self.ids[course]
+        return mask
+
+    def to_courses(self, mask):
+        """
+        :param mask: Bitset of course ids
+        :return: List of the Course keys in the bitset
+        """
+        return [self.courses[course_id] for course_id in bit_indices(mask)]
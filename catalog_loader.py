@@ -0,0 +1,223 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+"""
+
+import csv
+import hashlib
+import json
+import os
+import pickle
+import re
+from array import array
+from functools import lru_cache, partial
+
+from openpyxl import load_workbook
+
+from schedule import Course, CourseInfo
+
+# Directory holding catalog snapshots, one per distinct catalog file content. CATALOG_CACHE_DIR overrides it, otherwise
+# it is in the user's cache directory rather than next to the code or the catalogs, which can be read-only or shared.
+DEFAULT_CACHE_DIR = os.environ.get('CATALOG_CACHE_DIR') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'cs4269-catalogs')
+# Bumped whenever the snapshot layout changes so that old snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+COURSE_PATTERN = re.compile('((?:[A-Z]+-)?[A-Z]+)(.+)')
+
+
+@lru_cache(maxsize=None)
+def get_split_course(course):
+    """
+    Parses a course from programdesignation into the ('program, designation') form.
+    e.g. 'CS1101' -> ('CS', '1101')
+    """
+    return tuple(split_course for course_part in COURSE_PATTERN.findall(course) for split_course in course_part)
+
+
+def none_split(val):
+    """Handles calling split on a None value by returning the empty list."""
+    return val.split(', ') if val else ()
+
+
+def file_hash(file_path):
+    """
+    :param file_path: Path to the file to hash
+    :return: Hex SHA-256 digest of the file's content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_catalog_rows(dictionary_file_path):
+    """
+    Streams the rows of the 'catalog' sheet of an xlsx workbook with a read-only sheet iterator.
+
+    :param dictionary_file_path: Path to the xlsx file
+    :return: Generator of (program, designation, credits, terms, prereqs) tuples of plain Python values, where terms is
+     a tuple of term names and prereqs a tuple of alternatives, each a tuple of (program, designation) tuples.
+    """
+    wb = load_workbook(dictionary_file_path, read_only=True)
+    try:
+        for program, designation, credits, terms, prereqs in wb['catalog'].iter_rows(max_col=5, values_only=True):
+            if program is None and designation is None:
+                continue
+            yield (program, designation, credits, tuple(terms.split()) if terms else (),
+                   tuple(tuple(get_split_course(prereq) for prereq in alternative.split())
+                         for alternative in none_split(prereqs)))
+    finally:
+        wb.close()
+
+
+def read_csv_rows(dictionary_file_path):
+    """
+    Streams the rows of a CSV catalog with a header row naming the program, designation, credits, terms and prereqs
+    columns. Other columns are ignored, and terms and prereqs are written the same way as in the workbook, e.g.
+    "Spring Fall" and "CS1101 MATH1300, CS1104".
+
+    :param dictionary_file_path: Path to the csv file
+    :return: Generator of rows, @see read_catalog_rows
+    """
+    with open(dictionary_file_path, newline='') as file:
+        for row in csv.DictReader(file):
+            if not row['program'] and not row['designation']:
+                continue
+            # Fields missing at the end of a row are None, like empty cells of the workbook
+            terms = row['terms']
+            yield (row['program'], row['designation'], row['credits'], tuple(terms.split()) if terms else (),
+                   tuple(tuple(get_split_course(prereq) for prereq in alternative.split())
+                         for alternative in none_split(row['prereqs'])))
+
+
+def read_jsonl_rows(dictionary_file_path):
+    """
+    Streams the rows of a JSON lines catalog, one object per course with the keys program, designation, credits,
+    terms (list of term names) and prereqs (list of alternatives, each a list of [program, designation] pairs).
+
+    :param dictionary_file_path: Path to the jsonl file
+    :return: Generator of rows, @see read_catalog_rows
+    """
+    with open(dictionary_file_path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            yield (row['program'], row['designation'], str(row['credits']), tuple(row.get('terms', ())),
+                   tuple(tuple(tuple(prereq) for prereq in alternative) for alternative in row.get('prereqs', ())))
+
+
+# Row reader of each catalog file extension other than xlsx
+ROW_READERS = {'.csv': read_csv_rows, '.jsonl': read_jsonl_rows}
+
+
+def rows_in_goal_closure(read_rows, goals):
+    """
+    Keeps only the rows of the goals and of every course they could need through any prerequisite alternative. The
+    rows are read twice: the first pass only keeps an integer id per course and the ids each course requires, in flat
+    arrays, and the second one keeps the rows that are needed.
+
+    :param read_rows: Callable returning a new iterable of the catalog rows (@see read_catalog_rows) every call
+    :param goals: Iterable of (program, designation) of the goals
+    :return: Generator of the rows that are needed
+    """
+    ids = {}
+    # The ids a course requires are targets[starts[id]:ends[id]]
+    starts = array('i')
+    ends = array('i')
+    targets = array('i')
+
+    def id_of(course):
+        course_id = ids.get(course)
+        if course_id is None:
+            course_id = ids[course] = len(starts)
+            starts.append(0)
+            ends.append(0)
+        return course_id
+
+    for program, designation, _, _, prereqs in read_rows():
+        course_id = id_of((program, designation))
+        starts[course_id] = len(targets)
+        targets.extend(id_of(course) for alternative in prereqs for course in alternative)
+        ends[course_id] = len(targets)
+
+    stack = [id_of(tuple(goal)) for goal in goals]
+    needed = bytearray(len(starts))
+    while stack:
+        course_id = stack.pop()
+        if not needed[course_id]:
+            needed[course_id] = 1
+            stack.extend(targets[starts[course_id]:ends[course_id]])
+
+    return (row for row in read_rows() if needed[ids[row[0], row[1]]])
+
+
+def rows_to_course_dict(rows):
+    """
+    :param rows: Iterable of rows as produced by read_catalog_rows
+    :return: Dictionary of Course (key) to CourseInfo (value)
+    """
+    return {Course(program, designation): CourseInfo(credits, terms, prereqs)
+            for program, designation, credits, terms, prereqs in rows}
+
+
+def load_course_dict(dictionary_file_path, cache_dir=DEFAULT_CACHE_DIR, goals=None, content_hash=None):
+    """
+    Loads a course catalog from an xlsx workbook, or a csv or jsonl file (@see ROW_READERS), which are streamed one row
+    at a time. For a workbook the snapshot saved for the file's content is reused if there is one, on a miss the
+    workbook is streamed and a snapshot is saved for the next time.
+
+    :param dictionary_file_path: Path to the catalog file
+    :param cache_dir: Directory of the snapshots, None to always read the workbook
+    :param goals: Goal courses to only load the courses they could need for (@see rows_in_goal_closure), None to load
+     every course
+    :param content_hash: file_hash of the workbook if the caller already has it, so that finding its snapshot doesn't
+     read the whole file again
+    :return: Dictionary of Course (key) to CourseInfo (value)
+    """
+    row_reader = ROW_READERS.get(os.path.splitext(dictionary_file_path)[1].lower())
+    if row_reader is not None:
+        read_rows = partial(row_reader, dictionary_file_path)
+    elif cache_dir is None:
+        read_rows = partial(read_catalog_rows, dictionary_file_path)
+    else:
+        rows = load_workbook_rows(dictionary_file_path, cache_dir, content_hash)
+        read_rows = partial(iter, rows)
+
+    return rows_to_course_dict(read_rows() if goals is None else rows_in_goal_closure(read_rows, goals))
+
+
+def load_workbook_rows(dictionary_file_path, cache_dir, content_hash=None):
+    """
+    :return: List of the rows of a workbook (@see read_catalog_rows), from its snapshot when there is one
+    """
+    snapshot_path = os.path.join(cache_dir, (content_hash or file_hash(dictionary_file_path)) + '.pickle')
+    try:
+        with open(snapshot_path, 'rb') as snapshot:
+            version, rows = pickle.load(snapshot)
+        if version == SNAPSHOT_VERSION:
+            return rows
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    rows = list(read_catalog_rows(dictionary_file_path))
+    save_snapshot(snapshot_path, rows)
+    return rows
+
+
+def save_snapshot(snapshot_path, rows):
+    """
+    Writes a snapshot atomically so that concurrent workers never read a partly written one. Failing to write it only
+    means the next load reads the workbook again.
+    """
+    temp_path = snapshot_path + '.' + str(os.getpid()) + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        with open(temp_path, 'wb') as snapshot:
+            pickle.dump((SNAPSHOT_VERSION, rows), snapshot, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, snapshot_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,98 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+"""
+
+from array import array
+
+from schedule import NUM_SEMESTERS, get_scheduled_semester, get_scheduled_term
+
+# Semester of a course that isn't scheduled
+NOT_SCHEDULED = -1
+
+
+class CompactPlan:
+    """
+        Courses scheduled in semesters 1 to NUM_SEMESTERS, kept in a single array of signed bytes so that thousands of
+        plans fit in memory and copying one is a single buffer copy. The first NUM_SEMESTERS bytes are the credits of
+        each semester and the rest is the semester of each course id of the catalog, NOT_SCHEDULED for courses that
+        aren't in the plan. Courses of the initial state aren't part of the plan.
+    """
+
+    __slots__ = ('catalog', 'buffer')
+
+    def __init__(self, catalog, buffer=None):
+        """
+        :param catalog: CompiledCatalog the course ids refer to, shared by every plan made from it
+        :param buffer: Array to use as the plan, an empty plan if it is None
+        """
+        self.catalog = catalog
+        if buffer is None:
+            buffer = array('b', [0] * NUM_SEMESTERS + [NOT_SCHEDULED] * len(catalog))
+        self.buffer = buffer
+
+    @classmethod
+    def from_schedule(cls, schedule):
+        """
+        :param schedule: @see schedule.py
+        :return: CompactPlan of the courses scheduled so far
+        """
+        plan = cls(schedule.catalog)
+        for semester in range(1, NUM_SEMESTERS + 1):
+            for course in schedule.scheduled[semester]:
+                plan.add(course, semester)
+        return plan
+
+    @classmethod
+    def from_plan(cls, catalog, plan):
+        """
+        :param catalog: CompiledCatalog of the plan's courses
+        :param plan: List of (course, scheduled_term, course_credits), @see Schedule.get_plan
+        :return: CompactPlan of the plan
+        """
+        compact = cls(catalog)
+        for course, term, _ in plan:
+            compact.add(catalog.ids[course], get_scheduled_semester(term))
+        return compact
+
+    def __eq__(self, other):
+        return isinstance(other, CompactPlan) and self.buffer == other.buffer
+
+    def __len__(self):
+        return len(self.buffer) - NUM_SEMESTERS - self.buffer.count(NOT_SCHEDULED)
+
+    def copy(self):
+        return CompactPlan(self.catalog, array('b', self.buffer))
+
+    def add(self, course, semester):
+        """
+        Adds a course to the plan. Checking that it can be scheduled there is left to the caller.
+
+        :param course: Course id that isn't in the plan yet
+        :param semester: Integer number of semester, 1 to NUM_SEMESTERS
+        """
+        self.buffer[NUM_SEMESTERS + course] = semester
+        self.buffer[semester - 1] += self.catalog.credits[course]
+
+    def semester_of(self, course):
+        """
+        :return: Semester the course is scheduled in, NOT_SCHEDULED if it isn't in the plan
+        """
+        return self.buffer[NUM_SEMESTERS + course]
+
+    def get_total_credits(self, semester):
+        return self.buffer[semester - 1]
+
+    def placements(self):
+        """
+        :return: List of (course id, semester) of the plan, by semester and then course id
+        """
+        return sorted(((course, semester) for course, semester in enumerate(self.buffer[NUM_SEMESTERS:])
+                       if semester != NOT_SCHEDULED), key=lambda placement: (placement[1], placement[0]))
+
+    def to_plan(self):
+        """
+        :return: List of tuples in (course_key, scheduled_term, course_credits) format, @see Schedule.get_plan
+        """
+        return [(self.catalog.courses[course], get_scheduled_term(semester), self.catalog.credits[course])
+                for course, semester in self.placements()]
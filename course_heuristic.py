@@ -9,9 +9,10 @@ def course_heuristic(schedule, course):
     This heuristic function assigns a heuristic value to a course, based on problem details stored in the schedule class
 
     :param schedule: A class holding information about the current schedule we are building
-    :param course: The course to assign a heuristic value to.
+    :param course: The course id to assign a heuristic value to.
     :return: The heuristic value (smaller the number, higher the priority it will get in the search)
     """
     if course in schedule.heuristic_dictionary:
-        return schedule.heuristic_dictionary[course] + (0 if schedule.is_program_in_goal(course[0]) else 10)
+        program = schedule.catalog.courses[course][0]
+        return schedule.heuristic_dictionary[course] + (0 if schedule.is_program_in_goal(program) else 10)
     return 0
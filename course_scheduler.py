@@ -4,132 +4,791 @@
 """
 
 import sys
-import heapq
+import multiprocessing
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-from course_heuristic import course_heuristic
-from schedule import Schedule
+import instrumentation
+from catalog import bit_indices
+from compact_plan import CompactPlan
+from feasibility import find_infeasibility
+from frontier import Frontier
+from schedule import NUM_SEMESTERS, Schedule, get_scheduled_semester
+from search_memo import NogoodTable, subgoal_signature, subplan_key
 
-DEBUG = (sys.argv[1] == "debug") if len(sys.argv) > 1 else False
+# Result of course_scheduler_anytime. plan is the best plan found (@see course_scheduler), proven_minimal is True when
+# no plan can have fewer courses, budget_exceeded is True when the search was stopped by its budget and infeasibility
+# is the reason no plan can exist when that was found before searching (@see feasibility.py).
+AnytimeResult = namedtuple('AnytimeResult', 'plan, proven_minimal, budget_exceeded, infeasibility')
 
+# Outcomes of trying a prerequisite alternative (@see try_alternative)
+ALTERNATIVE_FOUND = 0
+ALTERNATIVE_FAILED = 1
+# The alternative failed and none of the alternatives after it can do better
+BACKJUMP = 2
 
-def log(msg=""):
-    """
-    Helper Function to print out a debugging message if DEBUG mode is on. (Any parameters are given to program)
+DEBUG = (sys.argv[1] == "debug") if len(sys.argv) > 1 else False
 
-    :param msg: Message to be printed
-    """
-    if DEBUG:
-        print(msg)
+if DEBUG:
+    # Print out the steps of the search if DEBUG mode is on. (Any parameters are given to program)
+    instrumentation.install(instrumentation.print_sink)
 
 
 def append_to_queue(frontier, courses, schedule):
     """
-    Add a list of courses to the search queue after assigning each a heuristic value
+    Add a list of courses to the search queue with their heuristic values (@see course_heuristic.py), which the
+    schedule has calculated beforehand
 
-    :param frontier: The priority queue to add courses to
-    :param courses: A list of courses to be added
+    :param frontier: The Frontier to add courses to (@see frontier.py)
+    :param courses: An iterable of course ids to be added
     :param schedule: @see schedule.py
     """
+    heuristic_values = schedule.heuristic_values
     for course in courses:
-        if course not in frontier:
-            value = course_heuristic(schedule, course)
-            heapq.heappush(frontier, (value, course))
+        frontier.push(course, heuristic_values[course])
+
+
+class SearchContext:
+    """
+        Tables shared by all the recursive calls of a search.
+    """
+
+    def __init__(self, nogoods=None, budget=None, alternative_pool=None, parallel_levels=2, subplans=None):
+        # NogoodTable of prerequisite sets known to fail, None to not remember failures
+        self.nogoods = nogoods
+        # SubplanCache of prerequisite sets already solved, None to search every set again
+        self.subplans = subplans
+        # SearchBudget the search stops at, None to search until it is done
+        self.budget = budget
+        # AlternativePool to search prerequisite alternatives in parallel with, None to try them one at a time
+        self.alternative_pool = alternative_pool
+        # Alternatives of subgoals fewer than this many levels below the goals are searched in parallel
+        self.parallel_levels = parallel_levels
+        # Number of levels the current subgoal is below the goals
+        self.level = 0
+        # Course id whose scheduling made the last failed search fail, None before any search failed
+        self.conflict = None
+        # Number of alternatives scheduled from a sub-plan instead of searched for so far (@see try_alternative)
+        self.splices = 0
+        # Bitset of the courses on a prerequisite cycle (@see prereq_analysis.PrereqAnalysis.cyclic) whose prerequisites
+        # are being searched for on the current path. A course needed again below itself fails there. Every cycle has
+        # such a course, so the other courses don't need to be kept.
+        self.expanding = 0
+        # Number of times a course failed for being on a prerequisite cycle so far. Those failures depend on the path
+        # and not only on the schedule, so they aren't remembered as nogoods.
+        self.cycle_cuts = 0
+
+
+class BudgetExceeded(Exception):
+    """Raised inside search when its SearchBudget runs out, unwinding every recursive call."""
+
+
+class SearchBudget:
+    """
+        Wall-clock and node limits of a search. Every subgoal the search expands is spent from the budget, and the
+        clock is only read every CLOCK_INTERVAL nodes to keep the check cheap.
+    """
+
+    CLOCK_INTERVAL = 16
+
+    def __init__(self, time_limit=None, node_limit=None):
+        """
+        :param time_limit: Seconds the search can take from now on, None for no limit
+        :param node_limit: Number of subgoals the search can expand, None for no limit
+        """
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.node_limit = node_limit
+        self.nodes = 0
+
+    def spend(self):
+        """
+        Spends a node of the budget.
+
+        :return: Error if the budget has run out
+        """
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise BudgetExceeded('node limit of ' + str(self.node_limit) + ' reached')
+        if self.deadline is not None and self.nodes % self.CLOCK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise BudgetExceeded('time limit reached')
 
 
-def search(frontier, schedule):
+def search(frontier, schedule, context=None):
     """
     Searches for a viable schedule to contain goal conditions in frontier. Recursive calls are made to schedule
      requirements. Requirements are given as new goal conditions
 
-    :param frontier: Priority queue holding all the courses that have to be scheduled to fulfill goal_conditions
+    :param frontier: Frontier holding all the courses that have to be scheduled to fulfill goal_conditions
     :param schedule: Schedule object that holds course catalog information and storage for courses found and stored so
     far.
-    :return: True if a scheduled found to fulfill all goal conditions, false if none can be found.
+    :param context: SearchContext shared by the recursive calls, None for an empty one
+    :return: True if a scheduled found to fulfill all goal conditions, false if none can be found. Error if the budget
+     of the context runs out, which leaves the schedule partially searched.
     """
+    if context is None:
+        context = SearchContext()
+    subplans = context.subplans
+    budget = context.budget
+    # Instrumentation is only done when a probe is installed (@see instrumentation.py), and events are only made when
+    # it has a sink to pass them to
+    probe = instrumentation.probe
+    tracer = probe if probe is not None and probe.sink is not None else None
+    courses = schedule.catalog.courses
+    cyclic = schedule.analysis.cyclic
+    # A sub-plan fits the courses taken but was found with other credits, so it can leave out room a search of the
+    # same prerequisites would have left and make a course after it fail. Courses popped from the frontier are kept,
+    # together with the (number of courses popped before, mark) of each course whose prerequisites reused a sub-plan
+    # somewhere below it, so that when a course fails the search can go back to the last of them and search its
+    # prerequisites again without sub-plans (@see back_to_splice)
+    popped = []
+    spliced = []
+    # Number of courses popped before the course to search again without sub-plans, None for none
+    fresh = None
+
     while frontier:  # AND
-        log()
-        log("Frontier")
-        log(frontier)
+        if budget is not None:
+            budget.spend()
+        if probe is not None:
+            probe.count('nodes_expanded')
+        if tracer is not None:
+            tracer.event('subgoal', course=courses[frontier.peek()], semesters=schedule.max_semester,
+                         frontier=[(value, courses[queued]) for value, queued in frontier.items()])
+        course = frontier.pop()
+        popped.append(course)
+        if schedule.courses_taken >> course & 1:
+            continue  # Already scheduled, e.g. as the prerequisite of another subgoal or kept by replan
+        if schedule.earliest.get(course, NUM_SEMESTERS + 1) > schedule.max_semester:
+            # Can't be done in time whatever prerequisites are chosen (@see prereq_analysis.earliest_semesters)
+            if probe is not None:
+                probe.count('pruned_subgoals')
+            if tracer is not None:
+                tracer.event('unschedulable', course=courses[course], schedule=schedule)
+            context.conflict = course
+            if not spliced:
+                return False
+            fresh = back_to_splice(frontier, schedule, popped, spliced)
+            continue
+        if context.expanding >> course & 1:
+            # Needed again below its own prerequisites, so this alternative goes around a cycle
+            if tracer is not None:
+                tracer.event('cycle', course=courses[course])
+            context.conflict = course
+            context.cycle_cuts += 1
+            if not spliced:
+                return False
+            fresh = back_to_splice(frontier, schedule, popped, spliced)
+            continue
+
+        mark = schedule.mark()
+        splices = context.splices
+        if fresh == len(popped) - 1:
+            context.subplans = None
+            fresh = None
+        on_cycle = cyclic & 1 << course
+        context.expanding |= on_cycle
+        try:
+            chosen_prerequisites = choose_prerequisites(course, schedule, context)
+        finally:
+            context.subplans = subplans
+            context.expanding &= ~on_cycle
+        if context.splices != splices:
+            spliced.append((len(popped) - 1, mark))
+
+        """ By here we either have the requirements for this course or tried all possible requirement for this course. 
+            If we still can't schedule it, then we failed to schedule it and must return False up the tree
+        """
+        if chosen_prerequisites is None or not schedule.schedule(course, chosen_prerequisites):
+            if chosen_prerequisites is not None:
+                if tracer is not None:
+                    tracer.event('unschedulable', course=courses[course], schedule=schedule)
+                context.conflict = course
+            if not spliced:
+                return False
+            fresh = back_to_splice(frontier, schedule, popped, spliced)
+            continue
+
+        if tracer is not None:
+            tracer.event('scheduled', course=courses[course], schedule=schedule)
+
+    return True
+
+
+def choose_prerequisites(course, schedule, context):
+    """
+    Tries the prerequisite alternatives of a course in order, in parallel if the context has a pool for its level, until
+    one of them is scheduled.
+
+    :param course: Course id whose prerequisites are chosen
+    :return: Bitset of the prerequisites chosen, which are scheduled, 0 if none of the alternatives can be scheduled or
+     the course has an alternative that is already done and None if the search jumps back over the course (@see
+     try_alternative). Error if the budget of the search runs out.
+    """
+    if context.alternative_pool is not None and context.level < context.parallel_levels \
+            and len(schedule.get_prereqs(course)) > 1:
+        return search_alternatives_in_parallel(course, schedule, context)
+
+    """
+        Try all possible sets of prerequisites for the current course
+    """
+    for prerequisites, signature in alternatives_to_try(course, schedule, context):  # OR
+        outcome = try_alternative(course, prerequisites, signature, schedule, context, search_prerequisites)
+        if outcome == ALTERNATIVE_FOUND:
+            return prerequisites
+        if outcome == BACKJUMP:
+            return None
+    return 0
 
-        course = heapq.heappop(frontier)[1]
-        log("Sub-goal chosen")
-        log(course)
 
-        possible_prerequisites = schedule.get_prereqs(course)
-        chosen_prerequisites = None
+def back_to_splice(frontier, schedule, popped, spliced):
+    """
+    Undoes a search back to before the last course whose prerequisites reused a sub-plan and queues it and every course
+    popped after it again, with the same priorities since a search only pops from its frontier.
+
+    :param frontier: Frontier of the search
+    :param popped: List of the courses the search popped from the frontier, cut back to the ones before the course
+    :param spliced: List of (number of courses popped before, mark) of the courses whose prerequisites reused a
+     sub-plan, the last of which is removed
+    :return: Number of courses popped before the course, whose prerequisites are to be searched without sub-plans
+    """
+    index, mark = spliced.pop()
+    schedule.undo(mark)
+    append_to_queue(frontier, popped[index:], schedule)
+    del popped[index:]
+    probe = instrumentation.probe
+    if probe is not None:
+        probe.count('subplan_retries')
+    return index
+
+
+def alternatives_to_try(course, schedule, context):
+    """
+    Goes through the prerequisite alternatives of a course that have to be searched for, in order. Alternatives of an
+    elective that are already done are skipped since an elective needs a course of its own, and so are alternatives
+    whose search is known to fail in the same situation. Nothing is left to search once an alternative is done.
+
+    :param course: Course id whose alternatives are gone through
+    :return: Generator of (bitset of the prerequisites that aren't taken yet, subgoal signature of them or None if
+     the context doesn't remember failures)
+    """
+    nogoods = context.nogoods
+    probe = instrumentation.probe
+    tracer = probe if probe is not None and probe.sink is not None else None
+    for prerequisites in schedule.get_prereqs(course):
+        """ 
+            If this is an elective and we already have this specific requirement than look for another
+        """
+        if schedule.is_elective(course) and not prerequisites & ~schedule.courses_taken:
+            continue
+
+        prerequisites &= ~schedule.courses_taken
 
+        """ 
+            If we already satisfy all the requirement for this course, we can go ahead and schedule it.
         """
-            Try all possible sets of prerequisites for the current course
+        if not prerequisites:
+            return
+
+        """
+            Skip the prerequisites if searching for them already failed in the same situation.
         """
-        for prerequisites in possible_prerequisites:  # OR
-            """ 
-                If this is an elective and we already have this specific requirement than look for another            
-            """
-            if schedule.is_elective(course) and set(prerequisites).issubset(schedule.courses_taken):
+        signature = None
+        if nogoods is not None:
+            signature = subgoal_signature(schedule, prerequisites)
+            if nogoods.is_nogood(signature):
+                if probe is not None:
+                    probe.count('nogood_hits')
+                if tracer is not None:
+                    tracer.event('nogood', course=schedule.catalog.courses[course])
                 continue
+        yield prerequisites, signature
 
-            prerequisites = set(prerequisites).difference(schedule.courses_taken)
 
-            """ 
-                If we already satisfy all the requirement for this course, we can go ahead and schedule it.            
-            """
-            if not prerequisites:
-                break
+def try_alternative(course, prerequisites, signature, schedule, context, search_for):
+    """
+    Tries to schedule a prerequisite alternative of a course, reusing a sub-plan of it if the context has one that still
+    fits (@see search_memo.SubplanCache) and searching for it otherwise. A failed alternative is undone and remembered
+    as a nogood, and the search jumps back over the alternatives after it when none of them can help: every alternative
+    needs the course the search failed at (@see SearchContext.conflict) and the courses scheduled before this choice
+    already block it. The caller checks the same conflict against its own choice.
 
-            schedule_copy = schedule.copy()
-            new_frontier = []
-            append_to_queue(new_frontier, prerequisites, schedule)
+    :param course: Course id the alternative is of
+    :param prerequisites: Bitset of the prerequisites of the alternative that aren't taken yet
+    :param signature: Subgoal signature of the prerequisites, None if the context doesn't remember failures
+    :param search_for: Callable (schedule, prerequisites, context) searching for the prerequisites from the current
+     schedule, returning True if they were scheduled (@see search_prerequisites)
+    :return: ALTERNATIVE_FOUND with the prerequisites scheduled, ALTERNATIVE_FAILED or BACKJUMP with the schedule as
+     it was. Error if the budget of the search runs out.
+    """
+    subplans = context.subplans
+    probe = instrumentation.probe
+    tracer = probe if probe is not None and probe.sink is not None else None
+    courses = schedule.catalog.courses
 
-            log("Trying Prerequisite")
-            log(str(prerequisites))
+    """
+        Reuse the courses a search of the same prerequisites scheduled before, if they still fit.
+    """
+    key = None
+    if subplans is not None:
+        key = subplan_key(schedule, prerequisites)
+        placements = subplans.get(key)
+        if placements is not None:
+            if splice_subplan(schedule, placements):
+                context.splices += 1
+                if probe is not None:
+                    probe.count('subplan_hits')
+                return ALTERNATIVE_FOUND
+            subplans.invalidate(key)
 
-            if search(new_frontier, schedule):
-                chosen_prerequisites = prerequisites
-                break
-            else:
-                schedule.assign(schedule_copy)
-                log("Child returned false")
+    mark = schedule.mark()
+    if probe is not None:
+        probe.count('or_branches')
+    if tracer is not None:
+        tracer.event('try', course=courses[course], prerequisites=schedule.catalog.to_courses(prerequisites))
+
+    cycle_cuts = context.cycle_cuts
+    if search_for(schedule, prerequisites, context):
+        if key is not None:
+            subplans.add(key, schedule.placements_since(mark))
+        return ALTERNATIVE_FOUND
+
+    if probe is not None:
+        start = time.perf_counter()
+        probe.count('backtracks')
+        probe.count('changes_undone', schedule.mark() - mark)
+    schedule.undo(mark)
+    if probe is not None:
+        probe.add_time('undo', time.perf_counter() - start)
+    if tracer is not None:
+        tracer.event('backtrack', course=courses[course])
+    if signature is not None and context.cycle_cuts == cycle_cuts:
+        context.nogoods.add(signature)
+
+    conflict = context.conflict
+    if schedule.mandatory.get(course, 0) >> conflict & 1 and schedule.is_blocked(conflict):
+        if probe is not None:
+            probe.count('backjumps')
+        if tracer is not None:
+            tracer.event('backjump', course=courses[course], conflict=courses[conflict])
+        return BACKJUMP
+    return ALTERNATIVE_FAILED
+
+
+def search_prerequisites(schedule, prerequisites, context):
+    """
+    Searches for a set of prerequisites one level below the current subgoal.
+
+    :param prerequisites: Bitset of the courses to schedule
+    :return: @see search
+    """
+    frontier = Frontier()
+    append_to_queue(frontier, bit_indices(prerequisites), schedule)
+    context.level += 1
+    try:
+        return search(frontier, schedule, context)
+    finally:
+        context.level -= 1
 
-        """ By here we either have the requirements for this course or tried all possible requirement for this course. 
-            If we still can't schedule it, then we failed to schedule it and must return False up the tree
-        """
-        if not schedule.schedule(course, chosen_prerequisites):
-            log("Couldn't schedule " + str(course))
-            log(schedule)
-            return False
 
-        log("New Schedule")
-        log(schedule)
+def splice_subplan(schedule, placements):
+    """
+    Schedules the courses of a sub-plan (@see search_memo.SubplanCache) in their semesters, or nothing if one of them
+    can't be scheduled there anymore.
 
+    :param placements: @see Schedule.placements_since
+    :return: True if every course was scheduled
+    """
+    mark = schedule.mark()
+    for course, semester, chosen_prerequisites in placements:
+        if not schedule.schedule_in(course, semester, chosen_prerequisites):
+            schedule.undo(mark)
+            return False
     return True
 
 
-def course_scheduler(course_descriptions, goal_conditions, initial_state):
+def search_depth(schedule, depth, context=None):
+    """
+    Resets the schedule to the initial state and searches for a schedule of the goals that fits in the given number
+    of semesters.
+
+    :param schedule: @see schedule.py
+    :param depth: Number of semesters the schedule can use
+    :param context: @see search
+    :return: True if a schedule is found, false otherwise
+    """
+    schedule.undo(0)
+    schedule.max_semester = depth
+
+    frontier = Frontier()
+    append_to_queue(frontier, schedule.goals, schedule)
+    return search(frontier, schedule, context)
+
+
+def course_scheduler(course_descriptions, goal_conditions, initial_state, workers=None, nogoods=None,
+                     alternative_workers=None, subplans=None):
     """
     State consists of a conjunction of courses/high-level requirements that are to be achieved.
     When conjunction set is empty a viable schedule should be in the schedule_set.
 
-    :param course_descriptions: Course catalog. A Python dictionary that uses Course as key and CourseInfo as value
+    Goals that are proven impossible before searching (@see feasibility.py) get an empty schedule right away.
+    Schedules are searched for with 1 to 8 semesters and the one with the fewest courses is kept. Depths below the
+    earliest semester the goals can be done in are skipped, and the search stops as soon as a schedule has as few
+    courses as any schedule could have.
+
+    :param course_descriptions: Course catalog. A Python dictionary that uses Course as key and CourseInfo as value, or
+     a CompiledCatalog (@see catalog.py) made from one
     :param goal_conditions: A list of courses or high-level requirements that a viable schedule would need to fulfill
     :param initial_state: A list of courses the student has already taken
-    :return: A List of scheduled courses in format (course, scheduled_term, course_credits)
+    :param workers: Number of processes to search different depths at the same time with. Depths are searched one
+     after the other when it is not given or the platform can't fork processes.
+    :param nogoods: NogoodTable (@see search_memo.py) to remember failed searches in. A new one is used for every call
+     when it is not given, pass the same one to share what was learned between calls with the same catalog.
+    :param alternative_workers: Number of processes to search the prerequisite alternatives of the goals' requirements
+     at the same time with (@see AlternativePool). The plan is the same as searching them one after the other. Only
+     used when depths are searched one after the other and the platform can fork processes.
+    :param subplans: SubplanCache (@see search_memo.py) to reuse the prerequisites solved by earlier searches from,
+     e.g. the shared requirements of many students of a major. Plans made with it are valid but can differ from the
+     ones made without it, since a sub-plan that still fits is kept even where a new search would do better. A
+     sub-plan that keeps a course after it from being scheduled is searched for again (@see search), so a plan is
+     found whenever one is without it. None to search every set of prerequisites again.
+    :return: A List of scheduled courses in format (course, scheduled_term, course_credits). Empty if no viable
+     schedule could be found.
+    """
+    return course_scheduler_anytime(course_descriptions, goal_conditions, initial_state, workers=workers,
+                                    nogoods=nogoods, alternative_workers=alternative_workers, subplans=subplans).plan
+
+
+def course_scheduler_anytime(course_descriptions, goal_conditions, initial_state, time_limit=None, node_limit=None,
+                             workers=None, nogoods=None, alternative_workers=None, subplans=None):
+    """
+    Same search as course_scheduler, but it stops when a time or node budget runs out and returns the best plan
+    found until then.
+
+    :param time_limit: Seconds the search can take, None for no limit
+    :param node_limit: Number of subgoals the search can expand over all the depths, None for no limit. Every worker
+     process has its own node limit.
+    :return: AnytimeResult of the best plan found, an empty plan if none was found before the budget ran out.
+     @see course_scheduler for the other parameters and the plan.
+    """
+    schedule = Schedule(course_descriptions, initial_state, goal_conditions)
+    infeasibility = find_infeasibility(schedule)
+    if infeasibility is not None:
+        return AnytimeResult([], False, False, infeasibility)
+    depths = range(max(schedule.min_semesters(), 1), NUM_SEMESTERS + 1)
+    min_courses = schedule.min_courses_scheduled()
+    budget = None
+    if time_limit is not None or node_limit is not None:
+        budget = SearchBudget(time_limit, node_limit)
+    context = SearchContext(NogoodTable() if nogoods is None else nogoods, budget, subplans=subplans)
+
+    can_fork = 'fork' in multiprocessing.get_all_start_methods()
+    if workers and workers > 1 and can_fork:
+        best_schedule, budget_exceeded = search_depths_in_parallel(schedule, depths, min_courses, workers, context)
+    else:
+        if alternative_workers and alternative_workers > 1 and can_fork:
+            context.alternative_pool = AlternativePool(schedule, context, alternative_workers)
+        try:
+            best_schedule, budget_exceeded = search_depths(schedule, depths, min_courses, context)
+        finally:
+            if context.alternative_pool is not None:
+                context.alternative_pool.shutdown()
+
+    if best_schedule is None:
+        return AnytimeResult([], False, budget_exceeded, None)
+
+    schedule.restore(best_schedule)
+    proven_minimal = schedule.num_of_courses_scheduled() == min_courses
+    schedule.max_semester = NUM_SEMESTERS
+    with instrumentation.Timer(instrumentation.probe, 'get_plan'):
+        return AnytimeResult(schedule.get_plan(), proven_minimal, budget_exceeded, None)
+
+
+def replan(course_descriptions, goal_conditions, initial_state, previous_plan, nogoods=None):
+    """
+    Plans again for a student whose initial state has changed, keeping as much of a previous plan as possible. Every
+    course of the previous plan that isn't taken yet is kept in its semester as long as it can still be scheduled
+    there, and only the goals and prerequisites that are left are searched for, using all 8 semesters. If the kept
+    courses leave no room for them, the student is planned from scratch.
+
+    :param previous_plan: Plan returned by course_scheduler or replan for the same catalog and goals
+    :return: @see course_scheduler for the parameters and the plan
+    """
+    schedule = Schedule(course_descriptions, initial_state, goal_conditions)
+    if find_infeasibility(schedule) is not None:
+        return []
+
+    ids = schedule.catalog.ids
+    schedule.schedule_placements((ids[course], get_scheduled_semester(term))
+                                 for course, term, _ in previous_plan if course in ids)
+    frontier = Frontier()
+    append_to_queue(frontier, schedule.goals, schedule)
+    if not search(frontier, schedule, SearchContext(NogoodTable() if nogoods is None else nogoods)):
+        return course_scheduler(schedule.catalog, goal_conditions, initial_state, nogoods=nogoods)
+
+    with instrumentation.Timer(instrumentation.probe, 'get_plan'):
+        return schedule.get_plan()
+
+
+def search_depths(schedule, depths, min_courses, context):
+    """
+    Searches the depths one after the other and keeps the schedule with the fewest courses, stopping early when one
+    has min_courses.
+
+    :return: (CompactPlan of the best schedule found (@see compact_plan.py), None if none is found, True if the budget
+     ran out before the depths were done)
     """
-    depths = range(1, 9)
+    probe = instrumentation.probe
     best_schedule = None
     best_schedule_num = float('inf')
-    schedule = Schedule(course_descriptions, initial_state, goal_conditions)
-    empty_schedule = schedule.copy()
     for depth in depths:
-        schedule.max_semester = depth
-        schedule.assign(empty_schedule)
+        try:
+            with instrumentation.Timer(probe, 'search'):
+                found = search_depth(schedule, depth, context)
+        except BudgetExceeded:
+            return best_schedule, True
+        if found and 0 < schedule.num_of_courses_scheduled() < best_schedule_num:
+            with instrumentation.Timer(probe, 'copy'):
+                best_schedule = CompactPlan.from_schedule(schedule)
+            best_schedule_num = schedule.num_of_courses_scheduled()
+            if best_schedule_num == min_courses:
+                break
+    return best_schedule, False
 
-        frontier = []
-        append_to_queue(frontier, goal_conditions, schedule)
-        search(frontier, schedule)
 
-        if 0 < schedule.num_of_courses_scheduled() < best_schedule_num:
-            best_schedule = schedule.copy()
-            best_schedule_num = schedule.num_of_courses_scheduled()
+class DepthBudget(SearchBudget):
+    """
+        Budget of a depth searched by a worker process, which runs out when the depths are no longer needed or the
+        budget of the search runs out.
+    """
+
+    def __init__(self, search_budget, cancelled):
+        super().__init__()
+        self.search_budget = search_budget
+        self.cancelled = cancelled
+
+    def spend(self):
+        if self.search_budget is not None:
+            self.search_budget.spend()
+        self.nodes += 1
+        if self.nodes % self.CLOCK_INTERVAL == 0 and self.cancelled.value:
+            raise BudgetExceeded('cancelled')
+
+
+# Schedule and SearchContext used by the depth worker processes, inherited from the parent process when it forks them
+depth_worker_schedule = None
+depth_worker_context = None
+
+
+def init_depth_worker(schedule, context, cancelled):
+    global depth_worker_schedule, depth_worker_context
+    depth_worker_schedule = schedule
+    depth_worker_context = context
+    context.budget = DepthBudget(context.budget, cancelled)
+
+
+def search_depth_in_worker(depth):
+    """
+    :return: (number of courses scheduled, CompactPlan buffer of the schedule) if a schedule is found at the given
+     depth, None if none is found and BudgetExceeded if the budget of the worker ran out first
+    """
+    schedule = depth_worker_schedule
+    try:
+        found = search_depth(schedule, depth, depth_worker_context)
+    except BudgetExceeded:
+        return BudgetExceeded
+    if found and schedule.num_of_courses_scheduled() > 0:
+        return schedule.num_of_courses_scheduled(), CompactPlan.from_schedule(schedule).buffer
+    return None
+
 
-    schedule.assign(best_schedule)
-    return schedule.get_plan()
+def search_depths_in_parallel(schedule, depths, min_courses, workers, context):
+    """
+    Searches every depth in forked worker processes that each start with their own copy of the schedule. Results are
+    looked at in depth order and the same schedule as searching the depths one after the other is chosen. Once it is
+    found the workers are told to stop through a flag shared with them, so no depth keeps searching in the background.
+
+    :return: (CompactPlan of the best schedule found (@see compact_plan.py), None if none is found, True if the budget
+     ran out before one of the depths was done)
+    """
+    best_schedule = None
+    best_schedule_num = float('inf')
+    budget_exceeded = False
+    fork = multiprocessing.get_context('fork')
+    cancelled = fork.Value('b', 0, lock=False)
+    executor = ProcessPoolExecutor(min(workers, len(depths)) or 1, mp_context=fork, initializer=init_depth_worker,
+                                   initargs=(schedule, context, cancelled))
+    try:
+        for future in [executor.submit(search_depth_in_worker, depth) for depth in depths]:
+            result = future.result()
+            if result is BudgetExceeded:
+                budget_exceeded = True
+            elif result is not None and result[0] < best_schedule_num:
+                best_schedule_num, best_schedule = result[0], CompactPlan(schedule.catalog, result[1])
+                if best_schedule_num == min_courses:
+                    break
+    finally:
+        cancelled.value = 1
+        executor.shutdown(wait=False, cancel_futures=True)
+    return best_schedule, budget_exceeded
+
+
+class AlternativePool:
+    """
+        Pool of forked worker processes that search the prerequisite alternatives of a subgoal at the same time (@see
+        search_alternatives_in_parallel). Workers start with a copy of the schedule and context the pool is made with
+        and are sent the schedule state to search each alternative from. Alternatives that are no longer needed are
+        told to stop through an array shared with the workers.
+    """
+
+    def __init__(self, schedule, context, workers):
+        fork = multiprocessing.get_context('fork')
+        # (task, index): alternatives of the task with a larger index stop searching
+        self.cancelled = fork.Array('q', [-1, -1], lock=False)
+        self.executor = ProcessPoolExecutor(workers, mp_context=fork, initializer=init_alternative_worker,
+                                            initargs=(schedule, context, self.cancelled))
+        # Number of subgoals whose alternatives were searched in the pool so far
+        self.tasks = 0
+
+    def cancel(self, task, index):
+        """Stops the alternatives of a task after the given index."""
+        self.cancelled[1] = index
+        self.cancelled[0] = task
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AlternativeBudget(SearchBudget):
+    """
+        Budget of an alternative searched by a worker process, which runs out when the alternative is cancelled or the
+        budget of the search it belongs to runs out.
+    """
+
+    def __init__(self, search_budget, cancelled, task, index):
+        super().__init__()
+        self.search_budget = search_budget
+        self.cancelled = cancelled
+        self.task = task
+        self.index = index
+
+    def spend(self):
+        if self.search_budget is not None:
+            self.search_budget.spend()
+        self.nodes += 1
+        if self.nodes % self.CLOCK_INTERVAL == 0 and self.cancelled[0] == self.task and self.cancelled[1] < self.index:
+            raise BudgetExceeded('cancelled')
+
+
+# Schedule, SearchContext and cancellation array of the alternative worker processes, set once by
+# init_alternative_worker
+alternative_worker_schedule = None
+alternative_worker_context = None
+alternative_worker_cancelled = None
+
+
+def init_alternative_worker(schedule, context, cancelled):
+    global alternative_worker_schedule, alternative_worker_context, alternative_worker_cancelled
+    alternative_worker_schedule = schedule
+    # Workers keep their own copy of the nogoods and sub-plans and never start a pool of their own
+    alternative_worker_context = SearchContext(context.nogoods, context.budget, subplans=context.subplans)
+    alternative_worker_cancelled = cancelled
+
+
+def search_alternative_in_worker(task, index, state, max_semester, prerequisites, expanding, use_subplans):
+    """
+    Searches for a set of prerequisites starting from the given schedule state.
+
+    :param state: @see Schedule.copy
+    :param expanding: @see SearchContext.expanding of the search that asked for it
+    :param use_subplans: False to search without the worker's sub-plans, as the search that asked for it does
+    :return: Copy of the schedule if the prerequisites can be scheduled, (the course id the search failed at (@see
+     SearchContext.conflict), True if a course failed for being on a prerequisite cycle) if they can't and
+     BudgetExceeded if the alternative was cancelled or the budget ran out first
+    """
+    schedule = alternative_worker_schedule
+    context = alternative_worker_context
+    schedule.assign(state)
+    schedule.max_semester = max_semester
+    search_budget = context.budget
+    subplans = context.subplans
+    context.budget = AlternativeBudget(search_budget, alternative_worker_cancelled, task, index)
+    if not use_subplans:
+        context.subplans = None
+    context.expanding = expanding
+    cycle_cuts = context.cycle_cuts
+    frontier = Frontier()
+    append_to_queue(frontier, bit_indices(prerequisites), schedule)
+    try:
+        found = search(frontier, schedule, context)
+    except BudgetExceeded:
+        return BudgetExceeded
+    finally:
+        context.budget = search_budget
+        context.subplans = subplans
+        context.expanding = 0
+    return schedule.copy() if found else (context.conflict, context.cycle_cuts != cycle_cuts)
+
+
+def search_alternatives_in_parallel(course, schedule, context):
+    """
+    Searches every prerequisite alternative of a course that the sequential search could try at the same time, each
+    from the current schedule. Results are gone through in the order of the alternatives with try_alternative, the
+    same way as the sequential search, so the first one that can be scheduled wins and the schedule is set to its
+    state. The alternatives after it are cancelled.
+
+    :param course: Course id whose alternatives are searched
+    :return: Bitset of the prerequisites chosen, 0 if none of the alternatives can be scheduled or the course has an
+     alternative that is already done and None if the search jumps back over the course (@see try_alternative). Error
+     if the budget of the search runs out.
+    """
+    pool = context.alternative_pool
+    candidates = list(alternatives_to_try(course, schedule, context))
+
+    probe = instrumentation.probe
+    if probe is not None:
+        probe.count('parallel_alternatives', len(candidates))
+    task = pool.tasks
+    pool.tasks += 1
+    state = schedule.copy()
+    use_subplans = context.subplans is not None
+    futures = [pool.executor.submit(search_alternative_in_worker, task, index, state, schedule.max_semester,
+                                    prerequisites, context.expanding, use_subplans)
+               for index, (prerequisites, _) in enumerate(candidates)]
+
+    try:
+        for (prerequisites, signature), future in zip(candidates, futures):
+            outcome = try_alternative(course, prerequisites, signature, schedule, context,
+                                      partial(take_alternative_result, future))
+            if outcome == ALTERNATIVE_FOUND:
+                return prerequisites
+            if outcome == BACKJUMP:
+                return None
+        return 0
+    finally:
+        pool.cancel(task, -1)
+        for future in futures:
+            future.cancel()
+
+
+def take_alternative_result(future, schedule, prerequisites, context):
+    """
+    Waits for an alternative searched by search_alternative_in_worker and sets the schedule to its state if it was
+    scheduled. Called by try_alternative in place of searching the alternative.
+
+    :param future: Future of the alternative
+    :return: True if the prerequisites were scheduled. Error if the budget of the search runs out.
+    """
+    result = future.result()
+    if result is BudgetExceeded:
+        raise BudgetExceeded('budget ran out while searching alternatives')
+    if isinstance(result, tuple):
+        context.conflict, cut = result
+        if cut:
+            context.cycle_cuts += 1
+        return False
+    schedule.assign(result)
+    if context.subplans is not None:
+        # The worker's search may have reused sub-plans of its own, which can't be seen from here
+        context.splices += 1
+    return True
@@ -4,56 +4,46 @@
 """
 import sys
 import os
-import re
-from collections import namedtuple
 from pprint import pprint
 import warnings
-
-from openpyxl import load_workbook
-
-from course_scheduler import course_scheduler
-
-Course = namedtuple('Course', 'program, designation')
-CourseInfo = namedtuple('CourseInfo', 'credits, terms, prereqs')
+import asyncio
+import csv
+import json
+import tempfile
+from functools import lru_cache
+
+from batch_scheduler import schedule_batch
+from benchmark import GOAL, generate_catalog
+from catalog import compile_catalog
+from catalog_loader import load_course_dict
+from compact_plan import CompactPlan
+import instrumentation
+from course_scheduler import course_scheduler, course_scheduler_anytime, replan
+from exact_scheduler import course_scheduler_exact, top_k_plans
+from planning_service import PlanningService
+from feasibility import CHAIN_TOO_LONG, MANDATORY_CREDITS, NEVER_OFFERED, PREREQUISITE_CYCLE, TOO_MANY_CREDITS
+from schedule import MAX_CREDITS, NUM_SEMESTERS, Course, CourseInfo
+from search_memo import SubplanCache
+
+
+@lru_cache(maxsize=None)
+def snapshot_dir():
+    """
+    :return: Temporary directory the tests keep their catalog snapshots in instead of the developer's cache
+     (@see catalog_loader.DEFAULT_CACHE_DIR), removed when the tests exit
+    """
+    return tempfile.TemporaryDirectory()
 
 
 def create_course_dict(dictionary_file_path="data/CourseCatalogSpring2020.xlsx"):
     """
-    Creates a dictionary containing course info.
+    Creates a dictionary containing course info. The workbook is only read the first time its content is seen, after
+    that a snapshot of it is loaded instead (@see catalog_loader.py).
     Keys: namedtuple of the form ('program, designation')
     Values: namedtuple of the form('name, prereqs, credits')
             prereqs is a tuple of prereqs where each prereq has the same form as the keys
     """
-    wb = load_workbook(dictionary_file_path)
-    catalog = wb.get_sheet_by_name('catalog')
-
-    course_dict = {}
-    for row in range(1, catalog.max_row + 1):
-        key = Course(get_val(catalog, 'A', row), get_val(catalog, 'B', row))
-        prereqs = tuple(tuple(get_split_course(prereq) for prereq in prereqs.split())
-                        for prereqs in none_split(get_val(catalog, 'E', row)))
-        val = CourseInfo(get_val(catalog, 'C', row), tuple(get_val(catalog, 'D', row).split()), prereqs)
-        course_dict[key] = val
-    return course_dict
-
-
-def get_split_course(course):
-    """
-    Parses a course from programdesignation into the ('program, designation') form.
-    e.g. 'CS1101' -> ('CS', '1101')
-    """
-    return tuple(split_course for course_part in re.findall('((?:[A-Z]+-)?[A-Z]+)(.+)', course)
-                 for split_course in course_part)
-
-
-def none_split(val):
-    """Handles calling split on a None value by returning the empty list."""
-    return val.split(', ') if val else ()
-
-
-def get_val(catalog, col, row):
-    """Returns the value of a cell."""
-    return catalog[col + str(row)].value
+    return load_course_dict(dictionary_file_path, snapshot_dir().name)
 
 
 def print_dict(dict):
@@ -113,6 +103,353 @@ def validate_catalog(catalog):
             print(key)
 
 
+class CrashingGoals:
+    """Goal conditions that kill the worker process planning them, the way a crash in native code would."""
+
+    def __iter__(self):
+        os._exit(1)
+
+
+def test_batch_crash_isolation():
+    """
+    Tests that a task crashing its worker only fails that task, and the tasks planned next to it still get their plans.
+    """
+    catalog = create_course_dict()
+    tasks = [([('CS', 'major')], []), (CrashingGoals(), []), ([('CS', 'major')], [('CS', '1101')])]
+    results = list(schedule_batch(catalog, tasks, workers=2))
+    return [result.index for result in results] == [0, 1, 2] and results[1].plan is None \
+        and results[1].error is not None and all(results[i].plan and results[i].error is None for i in (0, 2))
+
+
+def write_catalog_csv(catalog, file_path):
+    """Writes a catalog as a CSV file laid out the way catalog_loader.read_csv_rows reads it."""
+    with open(file_path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['program', 'designation', 'credits', 'terms', 'prereqs'])
+        for course, info in catalog.items():
+            prereqs = ', '.join(' '.join(program + designation for program, designation in alternative)
+                                for alternative in info.prereqs)
+            writer.writerow([course.program, course.designation, info.credits, ' '.join(info.terms), prereqs])
+
+
+def write_catalog_jsonl(catalog, file_path):
+    """Writes a catalog as a JSON lines file laid out the way catalog_loader.read_jsonl_rows reads it."""
+    with open(file_path, 'w') as file:
+        for course, info in catalog.items():
+            file.write(json.dumps({'program': course.program, 'designation': course.designation,
+                                   'credits': info.credits, 'terms': info.terms, 'prereqs': info.prereqs}) + '\n')
+
+
+def test_catalog_formats():
+    """
+    Tests that the catalog written as CSV and as JSON lines loads back as the same catalog as the workbook, credits
+    being read as text from both, and that a CSV row missing its last fields loads as having none.
+    """
+    catalog = create_course_dict()
+    expected = {course: info._replace(credits=str(info.credits)) for course, info in catalog.items()}
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'catalog.csv')
+        jsonl_path = os.path.join(directory, 'catalog.jsonl')
+        write_catalog_csv(catalog, csv_path)
+        write_catalog_jsonl(catalog, jsonl_path)
+        if load_course_dict(csv_path) != expected or load_course_dict(jsonl_path) != expected:
+            return False
+
+        short_path = os.path.join(directory, 'short.csv')
+        with open(short_path, 'w') as file:
+            file.write('program,designation,credits,terms,prereqs\nCS,1101,3\n')
+        return load_course_dict(short_path) == {Course('CS', '1101'): CourseInfo('3', (), ())}
+
+
+def test_goal_closure():
+    """
+    Tests that loading a catalog for some goals keeps exactly the goals and the courses they could need through any
+    prerequisite alternative, in every catalog format.
+    """
+    catalog = create_course_dict()
+    goals = [Course('CS', 'major'), Course('MATH', '2300')]
+    closure = set()
+    stack = [goal for goal in goals if goal in catalog]
+    while stack:
+        course = stack.pop()
+        if course not in closure:
+            closure.add(course)
+            stack.extend(Course(*prereq) for alternative in catalog[course].prereqs for prereq in alternative
+                         if prereq in catalog)
+    if len(closure) in (0, len(catalog)):
+        return False
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'catalog.csv')
+        write_catalog_csv(catalog, csv_path)
+        loaded = [load_course_dict('data/CourseCatalogSpring2020.xlsx', directory, goals),
+                  load_course_dict(csv_path, goals=goals)]
+    return all(set(courses) == closure for courses in loaded) and loaded[0] == {course: catalog[course]
+                                                                                for course in closure}
+
+
+def test_compact_plan_round_trip():
+    """
+    Tests that a real plan with 0 credit courses in both terms comes back unchanged from a CompactPlan.
+    """
+    test_folder = os.path.join(os.path.dirname(__file__), 'data/test_cases/')
+    catalog = create_course_dict(os.path.join(test_folder, 'test_multiple_0hr_at_once.xlsx'))
+    plan = course_scheduler(catalog, [('CS', 'major')], [])
+    if not any(credits == 0 for _, _, credits in plan) or len(set(season for _, (season, _), _ in plan)) != 2:
+        return False
+    # Courses of a semester come back by course id rather than in the order they were placed
+    return sorted(CompactPlan.from_plan(compile_catalog(catalog), plan).to_plan()) == sorted(plan)
+
+
+def test_anytime_budget():
+    """
+    Tests that the anytime search gives the course_scheduler plan when its budget is big enough, nothing when the
+    budget runs out before any plan is found and the plan found so far when it runs out after that.
+    """
+    catalog = create_course_dict()
+    goal = [('CS', 'major')]
+    probe = instrumentation.install()
+    try:
+        plan = course_scheduler(catalog, goal, [])
+    finally:
+        instrumentation.uninstall()
+    nodes = probe.counters['nodes_expanded']
+
+    enough = course_scheduler_anytime(catalog, goal, [], node_limit=nodes)
+    too_few = course_scheduler_anytime(catalog, goal, [], node_limit=1)
+    cut_short = course_scheduler_anytime(catalog, goal, [], node_limit=nodes - 1)
+    return enough.plan == plan and not enough.budget_exceeded and too_few.plan == [] and too_few.budget_exceeded \
+        and cut_short.plan == plan and cut_short.budget_exceeded
+
+
+def chain_catalog(length):
+    """
+    :return: Catalog of a ('T', 'goal') that needs a chain of length courses of ('T', '0') to ('T', str(length - 1))
+    """
+    terms = ('Spring', 'Fall')
+    catalog = {Course('T', str(i)): CourseInfo('3', terms, ((Course('T', str(i - 1)),),) if i else ())
+               for i in range(length)}
+    catalog[Course('T', 'goal')] = CourseInfo('0', terms, ((Course('T', str(length - 1)),),))
+    return catalog
+
+
+def test_infeasible_goals():
+    """
+    Tests that goals no plan can fulfill are reported with the reason before searching, and that goals a plan exists
+    for aren't.
+    """
+    terms = ('Spring', 'Fall')
+    goal = Course('T', 'goal')
+
+    def requires(*designations):
+        return tuple(Course('T', designation) for designation in designations),
+
+    mandatory = {Course('T', str(i)): CourseInfo('6', terms, ()) for i in range(30)}
+    mandatory[goal] = CourseInfo('0', terms, requires(*(str(i) for i in range(30))))
+    infeasible = [
+        (NEVER_OFFERED, {goal: CourseInfo('0', terms, requires('gone'))}),
+        (PREREQUISITE_CYCLE, {Course('T', 'a'): CourseInfo('3', terms, requires('b')),
+                              Course('T', 'b'): CourseInfo('3', terms, requires('a')),
+                              goal: CourseInfo('0', terms, requires('a'))}),
+        (CHAIN_TOO_LONG, chain_catalog(NUM_SEMESTERS + 1)),
+        (TOO_MANY_CREDITS, {Course('T', 'a'): CourseInfo(str(MAX_CREDITS + 1), terms, ()),
+                            goal: CourseInfo('0', terms, requires('a'))}),
+        (MANDATORY_CREDITS, mandatory),
+    ]
+    for reason, catalog in infeasible:
+        result = course_scheduler_anytime(catalog, [goal], [])
+        if result.plan or result.infeasibility is None or result.infeasibility.reason != reason:
+            return False
+
+    # The cycle between A and B can be left through C
+    cycle_with_exit = {Course('T', 'A'): CourseInfo('3', terms, requires('B')),
+                       Course('T', 'B'): CourseInfo('3', terms, requires('A') + requires('C')),
+                       Course('T', 'C'): CourseInfo('3', terms, ()),
+                       goal: CourseInfo('0', terms, requires('A'))}
+    feasible = [(chain_catalog(NUM_SEMESTERS), []), (chain_catalog(NUM_SEMESTERS + 1), [Course('T', '0')]),
+                (cycle_with_exit, [])]
+    for catalog, initial_state in feasible:
+        result = course_scheduler_anytime(catalog, [goal], initial_state)
+        if not result.plan or result.infeasibility is not None:
+            return False
+        if not course_scheduler_exact(catalog, [goal], initial_state).plan:
+            return False
+    return set(course for course, _, _ in course_scheduler(cycle_with_exit, [goal], [])) == \
+        {Course('T', designation) for designation in ('A', 'B', 'C', 'goal')}
+
+
+def test_replan_unchanged():
+    """
+    Tests that replanning a student whose state hasn't changed gives back the same plan, and that replanning after
+    the first semester is done keeps every course planned after it.
+    """
+    catalog = create_course_dict()
+    goal = [('CS', 'major')]
+    plan = course_scheduler(catalog, goal, [])
+    if not plan or sorted(replan(catalog, goal, [], plan)) != sorted(plan):
+        return False
+
+    first_semester = [course for course, term, _ in plan if term == ('Fall', 'Frosh')]
+    later = set(scheduled for scheduled in plan if scheduled[1] != ('Fall', 'Frosh'))
+    return later.issubset(replan(catalog, goal, first_semester, plan))
+
+
+def shared_subplan_students():
+    """
+    :return: (catalog, goal_conditions, list of initial states) of students whose sub-plans don't fit each other's
+     credits (@see search_memo.SubplanCache)
+    """
+    catalog = generate_catalog(32, alternative_size=2, requirements=6, credit_mix=((5, 0.5), (4, 0.5)), fall_only=0.3,
+                               spring_only=0.3, seed=0)
+    students = [[], [('SYN', '3007')], [('SYN', '1000'), ('SYN', '1001')],
+                [('SYN', '1000'), ('SYN', '1001'), ('SYN', '1002'), ('SYN', '1003')]]
+    return catalog, [GOAL], students
+
+
+def test_shared_subplans():
+    """
+    Tests that students planned one after the other with the same SubplanCache get a plan whenever a search of their
+    own finds one.
+    """
+    catalog, goal, students = shared_subplan_students()
+    subplans = SubplanCache()
+    for initial_state in students:
+        plan = course_scheduler(catalog, goal, initial_state, subplans=subplans)
+        if not plan and course_scheduler(catalog, goal, initial_state):
+            return False
+    return True
+
+
+def test_parallel_matches_sequential():
+    """
+    Tests that searching depths and prerequisite alternatives in worker processes gives the plans of a sequential
+    search, for several goals and initial states.
+    """
+    catalog = create_course_dict()
+    cases = [(catalog, [('CS', 'major')], []), (catalog, [('CS', 'major'), ('MATH', '2300')], [('CS', '1101')])]
+    synthetic, goal, students = shared_subplan_students()
+    cases += [(synthetic, goal, initial_state) for initial_state in students]
+    for course_descriptions, goal_conditions, initial_state in cases:
+        plan = course_scheduler(course_descriptions, goal_conditions, initial_state)
+        parallel_plan = course_scheduler(course_descriptions, goal_conditions, initial_state, workers=2,
+                                         alternative_workers=2)
+        # Courses of a semester are listed in the order they were placed, which the workers don't keep
+        if sorted(parallel_plan) != sorted(plan):
+            return False
+    return True
+
+
+def test_batch_shared_subplans():
+    """
+    Tests that a batch sharing sub-plans between its tasks gets a plan for every task a search of its own finds one
+    for.
+    """
+    catalog, goal, students = shared_subplan_students()
+    results = schedule_batch(catalog, [(goal, initial_state) for initial_state in students], workers=1,
+                             share_subplans=True)
+    return all(result.plan or not course_scheduler(catalog, goal, initial_state)
+               for result, initial_state in zip(results, students))
+
+
+async def exchange_with_service(service, requests):
+    """
+    Sends request lines to the service over a local connection and reads its answers until it closes it.
+
+    :param service: PlanningService (@see planning_service.py)
+    :param requests: List of request lines
+    :return: List of the responses, decoded
+    """
+    server = await asyncio.start_server(service.handle_client, '127.0.0.1', 0)
+    async with server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+        writer.write(''.join(request + '\n' for request in requests).encode())
+        writer.write_eof()
+        answers = await reader.read()
+        writer.close()
+    return [json.loads(line) for line in answers.splitlines()]
+
+
+def test_planning_service():
+    """
+    Tests that the planning service plans requests for the same plan once, answers a request it already planned from
+    its cache and answers requests it can't plan with an error instead of dropping them.
+    """
+    catalog_path = 'data/CourseCatalogSpring2020.xlsx'
+    request = {'catalog': catalog_path, 'goals': [['CS', 'major']], 'initial_state': []}
+    requests = [json.dumps(dict(request, id=1)), json.dumps(dict(request, id=2)), 'not json',
+                json.dumps(dict(request, id=4, catalog='data/missing.xlsx')),
+                json.dumps({'id': 5, 'catalog': catalog_path})]
+    service = PlanningService(workers=1, cache_dir=snapshot_dir().name)
+    try:
+        responses = {response['id']: response for response in asyncio.run(exchange_with_service(service, requests))}
+        coalesced = service.jobs == 1 and service.coalesced == 1
+        cached = asyncio.run(service.plan(catalog_path, [('CS', 'major')], [])) and service.hits == 1
+    finally:
+        service.close()
+    return coalesced and cached and len(responses) == 5 and responses[1]['plan'] \
+        and responses[1]['plan'] == responses[2]['plan'] and all('error' in responses[i] for i in (None, 4, 5))
+
+
+def small_catalogs():
+    """
+    :return: List of (catalog, goal_conditions) small enough to search exhaustively: the catalogs of data/test_cases
+     and a few synthetic ones (@see benchmark.generate_catalog)
+    """
+    test_folder = os.path.join(os.path.dirname(__file__), 'data/test_cases/')
+    catalogs = [(create_course_dict(os.path.join(test_folder, test_filename)), [('CS', 'major')])
+                for test_filename in sorted(os.listdir(test_folder))]
+    catalogs += [(generate_catalog(6, seed=seed), [GOAL]) for seed in range(4)]
+    catalogs += [(generate_catalog(8, seed=seed, elective_groups=(1,), elective_choices=2, requirements=3), [GOAL])
+                 for seed in range(4)]
+    catalogs += [(generate_catalog(num_courses), [GOAL]) for num_courses in (15, 16)]
+    return catalogs
+
+
+def test_exact_no_worse_than_greedy():
+    """
+    Tests that the exact plan never has more courses than the course_scheduler plan, that the number of courses it
+    reports is the one of the plan it gives out, and that a proven plan isn't below the lower bound.
+    """
+    for catalog, goal in small_catalogs():
+        greedy = course_scheduler(catalog, goal, [])
+        exact = course_scheduler_exact(catalog, goal, [], time_limit=2)
+        if len(exact.plan) > len(greedy) or bool(exact.plan) != bool(greedy):
+            return False
+        if exact.plan and (exact.courses != len(exact.plan) or exact.courses < exact.lower_bound):
+            return False
+    return True
+
+
+def test_top_k_distinct():
+    """
+    Tests that top_k_plans gives out distinct plans in order, counted the way they are given out, the best of them
+    never having more courses than the course_scheduler plan.
+    """
+    for catalog, goal in small_catalogs():
+        greedy = course_scheduler(catalog, goal, [])
+        options = top_k_plans(catalog, goal, [], 3, time_limit=2)
+        if bool(options) != bool(greedy):
+            return False
+        if not options:
+            continue
+        if len({tuple(sorted(option.plan)) for option in options}) != len(options):
+            return False
+        if any(option.courses != len(option.plan) for option in options):
+            return False
+        if [option[1:3] for option in options] != sorted(option[1:3] for option in options):
+            return False
+        if len(options[0].plan) > len(greedy):
+            return False
+    return True
+
+
+# Tests of the scheduler's other entry points, each returning True if it passes
+SCENARIO_TESTS = [test_catalog_formats, test_goal_closure, test_compact_plan_round_trip, test_anytime_budget,
+                  test_infeasible_goals, test_batch_crash_isolation, test_replan_unchanged,
+                  test_exact_no_worse_than_greedy, test_top_k_distinct, test_shared_subplans,
+                  test_batch_shared_subplans, test_parallel_matches_sequential, test_planning_service]
+
+
 def main():
     """
     Main function that creates the default dictionary and runs the course_scheduler with ('CS', 'major') as goal
@@ -171,6 +508,17 @@ if __name__ == "__main__":
                 tests_failed += 1
             test_count += 1
 
+        for scenario_test in SCENARIO_TESTS:
+            print("Test " + scenario_test.__name__)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                test_result = scenario_test()
+            print("\tPASS" if test_result else "\tFAIL")
+
+            if not test_result:
+                tests_failed += 1
+            test_count += 1
+
         print(tests_failed, " Tests Failed. Number of tests run: ", test_count)
     else:
         main()
@@ -0,0 +1,470 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+
+    Exact mode of the scheduler: a branch and bound search over every choice of prerequisite alternatives, for the
+    plan with the fewest courses, and a ranked enumeration of the best plans over the same choices.
+"""
+
+import bisect
+import heapq
+from collections import namedtuple
+
+from catalog import bit_indices
+from compact_plan import CompactPlan
+from course_scheduler import BudgetExceeded, SearchBudget, SearchContext, search_depths
+from feasibility import find_infeasibility
+from schedule import NUM_SEMESTERS, Schedule
+from search_memo import NogoodTable
+
+# Result of course_scheduler_exact. plan is the best plan found (@see course_scheduler) and courses its number of
+# courses, including the initial state. proven_optimal is True when every branch was either searched or pruned, so that
+# no plan the search can build has fewer courses. lower_bound is the mandatory-course bound of the goals every plan is
+# at least as big as, and nodes the number of branches searched.
+ExactResult = namedtuple('ExactResult', 'plan, courses, proven_optimal, lower_bound, nodes')
+
+# One of the plans given out by iter_plans. plan is the plan (@see course_scheduler), courses and credits are what it is
+# ranked by: its number of courses including the initial state and the credits of its courses, both with its semesters
+# filled. proven is True when no plan given out after it can be better.
+PlanOption = namedtuple('PlanOption', 'plan, courses, credits, proven')
+
+# Kinds of tasks of the search. EXPAND chooses the prerequisites of a course, PLACE schedules the course once they are
+# scheduled.
+EXPAND = 0
+PLACE = 1
+
+
+def push_expands(schedule, tasks, courses):
+    """
+    :param courses: Bitset of courses to expand
+    :return: tasks with the courses expanded first, in the order of their heuristic values
+    """
+    heuristic_values = schedule.heuristic_values
+    for course in sorted(bit_indices(courses), key=lambda course: (heuristic_values[course], course), reverse=True):
+        tasks = (EXPAND, course, 0, tasks)
+    return tasks
+
+
+def alternatives_of(schedule, course):
+    """
+    :return: Bitsets of the prerequisites still to be scheduled for each alternative that could be chosen for the
+     course, with the same rules as course_scheduler.search
+    """
+    courses_taken = schedule.courses_taken
+    elective = schedule.is_elective(course)
+    alternatives = []
+    for prerequisites in schedule.get_prereqs(course):
+        if elective and not prerequisites & ~courses_taken:
+            continue
+        prerequisites &= ~courses_taken
+        if not prerequisites:
+            # Nothing left to schedule, no other alternative can need fewer courses
+            return [0]
+        alternatives.append(prerequisites)
+    return alternatives or [0]
+
+
+def filled_plan(schedule):
+    """
+    Fills the semesters of the schedule the way get_plan does (@see Schedule.fill_semesters) and undoes it again, since
+    plans are compared the way they are given out.
+
+    :return: (CompactPlan of the filled schedule, its number of courses including the initial state, its credits)
+    """
+    mark = schedule.mark()
+    schedule.fill_semesters()
+    plan = CompactPlan.from_schedule(schedule)
+    courses = schedule.num_of_courses_scheduled()
+    credits = sum(plan.get_total_credits(semester) for semester in range(1, NUM_SEMESTERS + 1))
+    schedule.undo(mark)
+    return plan, courses, credits
+
+
+def mandatory_of(courses, mandatory):
+    """
+    :return: Union of the mandatory courses (@see prereq_analysis.mandatory_courses) of a bitset of courses
+    """
+    union = 0
+    for course in bit_indices(courses):
+        union |= mandatory[course]
+    return union
+
+
+class ExactSearch:
+    """
+        Depth first branch and bound over the same AND/OR structure as course_scheduler.search. Courses are expanded
+        in the same order, but every prerequisite alternative of a course is a branch instead of only the first one
+        that works, and so is every semester a course with credits fits in after its prerequisites (@see
+        Schedule.fitting_semesters), earliest first. The plans course_scheduler can find are among the plans this
+        builds. Plans are compared once their semesters are filled, the way they are given out (@see filled_plan).
+
+        A branch is pruned when the courses taken so far together with the mandatory courses (@see
+        prereq_analysis.mandatory_courses) of every course still to be expanded or placed are already as many as in
+        the best plan found. Since every plan that completes a course schedules its mandatory courses, and filling
+        semesters only adds courses, this never prunes a better plan. Once a course is placed its mandatory courses
+        are all taken, so the union of the mandatory courses of the courses seen on the path is kept instead of
+        recomputing it.
+    """
+
+    def __init__(self, schedule, budget=None, incumbent=None):
+        """
+        :param schedule: @see schedule.py
+        :param budget: SearchBudget the search stops at, None to search until it is done
+        :param incumbent: CompactPlan of a plan for the schedule's goals to start from, so that only better plans are
+         searched for
+        """
+        self.schedule = schedule
+        self.budget = budget
+        # CompactPlan of the best plan found so far, with its semesters filled, and its number of courses, including
+        # the initial state
+        self.best = None
+        self.best_num = float('inf')
+        if incumbent is not None:
+            schedule.restore(incumbent)
+            schedule.max_semester = NUM_SEMESTERS
+            self.best, self.best_num, _ = filled_plan(schedule)
+            schedule.undo(0)
+        self.nodes = 0
+
+    def run(self):
+        """
+        Searches for the plan with the fewest courses, which is kept in self.best.
+
+        :return: Error if the budget runs out before the search is done
+        """
+        schedule = self.schedule
+        schedule.undo(0)
+        schedule.max_semester = NUM_SEMESTERS
+        goals = 0
+        for goal in schedule.goals:
+            goals |= 1 << goal
+        self.__search(push_expands(schedule, None, goals), mandatory_of(goals, schedule.mandatory), 0)
+
+    def __search(self, tasks, required, pending):
+        """
+        Runs tasks until the next choice between alternatives, then searches each alternative as a branch. The
+        schedule is set back to how it was when the call returns.
+
+        :param tasks: Linked list of (kind, course, chosen prerequisites, rest of the tasks) tuples, None when empty
+        :param required: Bitset of the mandatory courses of the courses seen on the path
+        :param pending: Bitset of the courses expanded but not placed yet
+        """
+        schedule = self.schedule
+        mandatory = schedule.mandatory
+        mark = schedule.mark()
+        try:
+            while tasks is not None:
+                kind, course, chosen, tasks = tasks
+                if kind == PLACE:
+                    semesters = schedule.fitting_semesters(course)
+                    if not semesters:
+                        return
+                    pending &= ~(1 << course)
+                    if len(semesters) == 1:
+                        schedule.schedule_in(course, semesters[0], chosen)
+                        continue
+
+                    if bin(schedule.courses_taken | required).count('1') >= self.best_num:
+                        return
+                    for semester in semesters:
+                        self.nodes += 1
+                        if self.budget is not None:
+                            self.budget.spend()
+                        placed = schedule.mark()
+                        schedule.schedule_in(course, semester, chosen)
+                        self.__search(tasks, required, pending)
+                        schedule.undo(placed)
+                    return
+
+                if schedule.courses_taken >> course & 1:
+                    continue
+                if pending >> course & 1 or schedule.earliest.get(course, NUM_SEMESTERS + 1) > NUM_SEMESTERS:
+                    return  # On a cycle or can't be done in time
+                pending |= 1 << course
+
+                alternatives = alternatives_of(schedule, course)
+                if len(alternatives) == 1:
+                    tasks = push_expands(schedule, (PLACE, course, alternatives[0], tasks), alternatives[0])
+                    required |= mandatory_of(alternatives[0], mandatory)
+                    continue
+
+                branches = []
+                for prerequisites in alternatives:
+                    branch_required = required | mandatory_of(prerequisites, mandatory)
+                    bound = bin(schedule.courses_taken | branch_required).count('1')
+                    branches.append((bound, len(branches), prerequisites, branch_required))
+                for bound, _, prerequisites, branch_required in sorted(branches):
+                    if bound >= self.best_num:
+                        break
+                    self.nodes += 1
+                    if self.budget is not None:
+                        self.budget.spend()
+                    self.__search(push_expands(schedule, (PLACE, course, prerequisites, tasks), prerequisites),
+                                  branch_required, pending)
+                return
+
+            if schedule.num_of_courses_scheduled() < self.best_num:
+                plan, courses, _ = filled_plan(schedule)
+                if courses < self.best_num:
+                    self.best, self.best_num = plan, courses
+        finally:
+            schedule.undo(mark)
+
+
+def course_scheduler_exact(course_descriptions, goal_conditions, initial_state, time_limit=None, node_limit=None):
+    """
+    Finds the plan with the fewest courses among every plan the search can build, by trying every prerequisite
+    alternative and semester and pruning branches that can't beat the best plan found (@see ExactSearch). The plan
+    course_scheduler finds is the first one to beat, so the plan is never worse than that one. This can take much
+    longer than course_scheduler, which only tries alternatives until one works, so a budget can be given: when it runs
+    out the best plan found so far is returned without the proof.
+
+    :param time_limit: Seconds the search can take, None for no limit
+    :param node_limit: Number of branches the search can try, None for no limit
+    :return: ExactResult, with an empty plan if no plan exists. @see course_scheduler for the other parameters.
+    """
+    schedule = Schedule(course_descriptions, initial_state, goal_conditions)
+    lower_bound = schedule.min_courses_scheduled()
+    if find_infeasibility(schedule) is not None:
+        return ExactResult([], 0, True, lower_bound, 0)
+
+    budget = None
+    if time_limit is not None or node_limit is not None:
+        budget = SearchBudget(time_limit, node_limit)
+    depths = range(max(schedule.min_semesters(), 1), NUM_SEMESTERS + 1)
+    incumbent, budget_exceeded = search_depths(schedule, depths, lower_bound, SearchContext(NogoodTable(), budget))
+    search = ExactSearch(schedule, budget, incumbent)
+    proven_optimal = False
+    if not budget_exceeded:
+        try:
+            search.run()
+            proven_optimal = True
+        except BudgetExceeded:
+            pass
+
+    if search.best is None:
+        return ExactResult([], 0, proven_optimal, lower_bound, search.nodes)
+    schedule.restore(search.best)
+    schedule.max_semester = NUM_SEMESTERS
+    return ExactResult(schedule.get_plan(), search.best_num, proven_optimal, lower_bound, search.nodes)
+
+
+class PlanEnumerator:
+    """
+        Finds distinct plans for the goals of a schedule, fewest courses first and then fewest credits, over the same
+        choices of alternatives and semesters as ExactSearch. Plans are ranked and told apart once their semesters are
+        filled (@see filled_plan), so two choices that fill up to the same plan only give it out once.
+
+        The search is depth first in the order of the alternatives, like course_scheduler.search, so the first plan is
+        found as fast as there. Each branch taken from the stack is followed down to a plan by choosing the first
+        alternative at every OR choice and the earliest semester at every placement and pushing the others, so plans
+        below a choice reuse the partial plan above it instead of searching it again. Every branch on the stack has a
+        lower bound on the (courses, credits) of any plan below it: the courses taken so far and the mandatory courses
+        of every course still open. A plan found is only given out once no branch on the stack could lead to a better
+        one.
+
+        Branches on the stack are stored as the tasks left and the placements made so far, which are replayed into the
+        schedule when the branch is searched.
+    """
+
+    def __init__(self, schedule, budget=None, k=None):
+        """
+        :param schedule: @see schedule.py
+        :param budget: SearchBudget the search stops at, None to search until every plan is found
+        :param k: Number of plans wanted, used to prune branches that can't be among the best k. None for no limit.
+        """
+        self.schedule = schedule
+        self.budget = budget
+        self.k = k
+        # Branches as (courses, credits, sequence number, tasks, required, pending, placements), @see ExactSearch for
+        # tasks, required and pending. placements is a linked list of (course, semester, chosen prerequisites) tuples
+        # of the courses placed so far, the last one first.
+        self.stack = []
+        # Heap of the (courses, credits, sequence number) of the branches on the stack, and sequence numbers of the
+        # branches taken off the stack since, which are dropped from the heap when they come up
+        self.bounds = []
+        self.taken_off = set()
+        # Plans found but not given out yet as (courses, credits, sequence number, CompactPlan)
+        self.found = []
+        # Buffers of every filled plan found so far, to skip plans reached again through other choices
+        self.seen = set()
+        # Sorted (courses, credits) of every plan found so far
+        self.found_keys = []
+        self.sequence = 0
+
+    def __iter__(self):
+        """
+        :return: Generator of (courses, credits, CompactPlan) of every plan, in order. Error if the budget runs out.
+        """
+        schedule = self.schedule
+        schedule.undo(0)
+        schedule.max_semester = NUM_SEMESTERS
+        goals = 0
+        for goal in schedule.goals:
+            goals |= 1 << goal
+        self.__push(push_expands(schedule, None, goals), mandatory_of(goals, schedule.mandatory), 0, None)
+
+        given = 0
+        while self.stack or self.found:
+            bound = self.__bound()
+            while self.found and (bound is None or self.found[0][:2] <= bound):
+                courses, credits, _, plan = heapq.heappop(self.found)
+                yield courses, credits, plan
+                given += 1
+                if given == self.k:
+                    return
+            if not self.stack:
+                continue
+            if self.budget is not None:
+                self.budget.spend()
+            courses, credits, sequence, tasks, required, pending, placements = self.stack.pop()
+            self.taken_off.add(sequence)
+            if self.__cut_off((courses, credits)):
+                continue
+            self.__replay(placements)
+            self.__dive(tasks, required, pending, placements)
+
+    def unproven(self):
+        """
+        :return: Generator of (courses, credits, CompactPlan) of the plans found but not given out yet, in order
+        """
+        while self.found:
+            courses, credits, _, plan = heapq.heappop(self.found)
+            yield courses, credits, plan
+
+    def __bound(self):
+        """
+        :return: Smallest (courses, credits) of the branches on the stack, None if it is empty
+        """
+        bounds = self.bounds
+        while bounds and bounds[0][2] in self.taken_off:
+            self.taken_off.discard(heapq.heappop(bounds)[2])
+        return bounds[0][:2] if bounds else None
+
+    def __key(self, courses):
+        """
+        :return: (number of courses, credits excluding the initial state) of the taken courses and the given bitset
+        """
+        schedule = self.schedule
+        courses |= schedule.courses_taken
+        credits = sum(schedule.get_credits(course) for course in bit_indices(courses & ~schedule.taken_by[0]))
+        return bin(courses).count('1'), credits
+
+    def __cut_off(self, key):
+        """
+        :return: True if k plans at least as good as a branch with the given key were found already
+        """
+        return self.k is not None and len(self.found_keys) >= self.k and key >= self.found_keys[self.k - 1]
+
+    def __push(self, tasks, required, pending, placements):
+        key = self.__key(required)
+        if not self.__cut_off(key):
+            self.stack.append(key + (self.sequence, tasks, required, pending, placements))
+            heapq.heappush(self.bounds, key + (self.sequence,))
+            self.sequence += 1
+
+    def __replay(self, placements):
+        schedule = self.schedule
+        schedule.undo(0)
+        forward = []
+        while placements is not None:
+            placement, placements = placements
+            forward.append(placement)
+        for course, semester, chosen in reversed(forward):
+            schedule.schedule_in(course, semester, chosen)
+
+    def __dive(self, tasks, required, pending, placements):
+        """
+        Runs tasks, choosing the first alternative at every OR choice and the earliest semester at every placement and
+        pushing the others on the stack, until a plan is found or a course can't be placed.
+        """
+        schedule = self.schedule
+        mandatory = schedule.mandatory
+        while tasks is not None:
+            kind, course, chosen, tasks = tasks
+            if kind == PLACE:
+                semesters = schedule.fitting_semesters(course)
+                if not semesters:
+                    return
+                pending &= ~(1 << course)
+                for semester in reversed(semesters[1:]):
+                    self.__push(tasks, required, pending, ((course, semester, chosen), placements))
+                schedule.schedule_in(course, semesters[0], chosen)
+                placements = ((course, semesters[0], chosen), placements)
+                continue
+
+            if schedule.courses_taken >> course & 1:
+                continue
+            if pending >> course & 1 or schedule.earliest.get(course, NUM_SEMESTERS + 1) > NUM_SEMESTERS:
+                return
+            pending |= 1 << course
+
+            branches = []
+            for prerequisites in alternatives_of(schedule, course):
+                branch_required = required | mandatory_of(prerequisites, mandatory)
+                branches.append(self.__key(branch_required) + (len(branches), prerequisites, branch_required))
+            for _, _, _, prerequisites, branch_required in reversed(branches[1:]):
+                self.__push(push_expands(schedule, (PLACE, course, prerequisites, tasks), prerequisites),
+                            branch_required, pending, placements)
+            courses, credits, _, prerequisites, required = branches[0]
+            if self.__cut_off((courses, credits)):
+                return
+            tasks = push_expands(schedule, (PLACE, course, prerequisites, tasks), prerequisites)
+
+        plan, courses, credits = filled_plan(schedule)
+        if plan.buffer.tobytes() in self.seen:
+            return
+        self.seen.add(plan.buffer.tobytes())
+        key = (courses, credits)
+        bisect.insort(self.found_keys, key)
+        heapq.heappush(self.found, key + (self.sequence, plan))
+        self.sequence += 1
+
+
+def iter_plans(course_descriptions, goal_conditions, initial_state, k=None, time_limit=None, node_limit=None):
+    """
+    Generates distinct plans for the goals, fewest courses first and then fewest credits (@see PlanEnumerator). Each
+    plan is given out as soon as no better one can be found, so the first one can be shown before the others are
+    ready. If the budget runs out, the plans found but not proven to come next are given out in order, marked as not
+    proven.
+
+    :param k: Number of plans to generate at most, None for every plan the search can build
+    :param time_limit: Seconds the search can take, None for no limit
+    :param node_limit: Number of branches the search can try, None for no limit
+    :return: Generator of PlanOption. @see course_scheduler for the other parameters.
+    """
+    schedule = Schedule(course_descriptions, initial_state, goal_conditions)
+    if find_infeasibility(schedule) is not None:
+        return
+
+    budget = None
+    if time_limit is not None or node_limit is not None:
+        budget = SearchBudget(time_limit, node_limit)
+    enumerator = PlanEnumerator(schedule, budget, k)
+    given = 0
+    try:
+        for courses, credits, plan in enumerator:
+            yield plan_option(schedule, plan, courses, credits, True)
+            given += 1
+    except BudgetExceeded:
+        for courses, credits, plan in enumerator.unproven():
+            if given == k:
+                return
+            yield plan_option(schedule, plan, courses, credits, False)
+            given += 1
+
+
+def plan_option(schedule, plan, courses, credits, proven):
+    """
+    :return: PlanOption of a CompactPlan, with the semesters of the plan filled up (@see Schedule.get_plan)
+    """
+    schedule.restore(plan)
+    schedule.max_semester = NUM_SEMESTERS
+    return PlanOption(schedule.get_plan(), courses, credits, proven)
+
+
+def top_k_plans(course_descriptions, goal_conditions, initial_state, k, time_limit=None, node_limit=None):
+    """
+    :return: List of the k best distinct plans as PlanOption, fewer if there aren't as many, @see iter_plans
+    """
+    return list(iter_plans(course_descriptions, goal_conditions, initial_state, k, time_limit, node_limit))
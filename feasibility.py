@@ -0,0 +1,91 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+
+    Proofs that the goals of a Schedule can't be fulfilled, found from the prerequisite analysis of its catalog before
+    any search is done.
+"""
+
+from collections import namedtuple
+
+from catalog import bit_indices
+from schedule import MAX_CREDITS, NUM_SEMESTERS
+
+# Why the goals of a schedule can't be fulfilled. reason is one of the reasons below, course is the Course it is about
+# and detail is a readable explanation.
+Infeasibility = namedtuple('Infeasibility', 'reason, course, detail')
+
+# A course every way of doing a goal needs isn't in the catalog or has no terms
+NEVER_OFFERED = 'never offered'
+# Every way of doing a goal is blocked, and the first one blocks at a course that requires itself
+PREREQUISITE_CYCLE = 'prerequisite cycle'
+# The shortest prerequisite chain of a goal is longer than NUM_SEMESTERS
+CHAIN_TOO_LONG = 'chain too long'
+# A course every plan needs has more than MAX_CREDITS credits
+TOO_MANY_CREDITS = 'too many credits'
+# The courses every plan needs add up to more credits than NUM_SEMESTERS semesters can hold
+MANDATORY_CREDITS = 'mandatory credits'
+
+
+def find_infeasibility(schedule):
+    """
+    Looks for a proof that the goals of the schedule can't be fulfilled from its initial state, in time linear in the
+    part of the catalog the goals need. Finding no proof doesn't mean a plan exists.
+
+    :param schedule: @see schedule.py
+    :return: Infeasibility, None if none was found
+    """
+    catalog = schedule.catalog
+    for goal in schedule.goals:
+        if goal not in schedule.earliest:
+            return explain_incompletable(schedule, goal)
+
+    for goal in schedule.goals:
+        if schedule.earliest[goal] > NUM_SEMESTERS:
+            return Infeasibility(CHAIN_TOO_LONG, catalog.courses[goal],
+                                 'needs at least ' + str(schedule.earliest[goal]) + ' semesters')
+
+    required = 0
+    for goal in schedule.goals:
+        required |= schedule.mandatory[goal]
+    required &= ~schedule.taken_by[0]
+    total_credits = 0
+    for course in bit_indices(required):
+        if catalog.credits[course] > MAX_CREDITS:
+            return Infeasibility(TOO_MANY_CREDITS, catalog.courses[course],
+                                 'has ' + str(catalog.credits[course]) + ' credits')
+        total_credits += catalog.credits[course]
+    if total_credits > MAX_CREDITS * NUM_SEMESTERS:
+        return Infeasibility(MANDATORY_CREDITS, None, 'courses every plan needs add up to ' + str(total_credits) +
+                             ' credits')
+    return None
+
+
+def explain_incompletable(schedule, course):
+    """
+    Finds why a course can never be completed (@see prereq_analysis.earliest_semesters). Every alternative of such a
+    course has a prerequisite that can't be completed either, so following one down from the course ends at a course
+    that is never offered or at a course already on the path.
+
+    :param course: Course id missing from schedule.earliest
+    :return: Infeasibility
+    """
+    catalog = schedule.catalog
+    on_path = 0
+    while catalog.terms[course]:
+        on_path |= 1 << course
+        blocked = None
+        for prerequisites in catalog.prereqs[course]:
+            blocked = next((prereq for prereq in bit_indices(prerequisites) if prereq not in schedule.earliest), None)
+            if blocked is not None:
+                break
+        if blocked is None:
+            break
+        if on_path >> blocked & 1:
+            return Infeasibility(PREREQUISITE_CYCLE, catalog.courses[blocked],
+                                 'is needed by a prerequisite of its own')
+        course = blocked
+
+    if catalog.courses[course] not in catalog.descriptions:
+        return Infeasibility(NEVER_OFFERED, catalog.courses[course], 'is not in the catalog')
+    return Infeasibility(NEVER_OFFERED, catalog.courses[course], 'is not offered in any term')
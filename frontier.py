@@ -0,0 +1,66 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+"""
+
+import heapq
+
+
+class Frontier:
+    """
+        Priority queue of the courses a search still has to schedule. Each course is in the queue at most once, with
+        its smallest priority so far: pushing a course that is already queued only lowers its priority (decrease-key),
+        leaving the old heap entry behind to be skipped when it comes up. Courses with the same priority come out in
+        catalog order.
+    """
+
+    def __init__(self):
+        # Heap of (priority, course id), including entries left behind by decrease-key
+        self.heap = []
+        # Current priority of each queued course
+        self.priority = {}
+
+    def __len__(self):
+        return len(self.priority)
+
+    def __contains__(self, course):
+        return course in self.priority
+
+    def push(self, course, priority):
+        """
+        Queues a course, or lowers its priority if it is already queued with a higher one.
+
+        :param course: Course id
+        :param priority: Smaller priorities come out first
+        """
+        if course in self.priority and self.priority[course] <= priority:
+            return
+        self.priority[course] = priority
+        heapq.heappush(self.heap, (priority, course))
+
+    def peek(self):
+        """
+        :return: Course id that pop would return
+        """
+        self.__drop_stale()
+        return self.heap[0][1]
+
+    def pop(self):
+        """
+        :return: Queued course id with the smallest priority, which is removed from the queue
+        """
+        self.__drop_stale()
+        course = heapq.heappop(self.heap)[1]
+        del self.priority[course]
+        return course
+
+    def items(self):
+        """
+        :return: List of (priority, course id) of the queued courses in the order they come out
+        """
+        return sorted((priority, course) for course, priority in self.priority.items())
+
+    def __drop_stale(self):
+        heap = self.heap
+        while self.priority.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
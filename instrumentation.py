@@ -0,0 +1,135 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+
+    Counters, timers and trace events of the search. Nothing is collected until a Probe is installed: instrumented
+    code reads the module-level probe once and skips all instrumentation work while it is None.
+"""
+
+import json
+import time
+from collections import Counter, defaultdict
+
+# Probe currently collecting, None when instrumentation is off
+probe = None
+
+
+class Probe:
+    """
+        Collects named counters and timers, and passes trace events to a sink.
+    """
+
+    def __init__(self, sink=None):
+        # Callable given every trace event as a dictionary with an 'event' key, None to only keep counters and timers
+        self.sink = sink
+        self.counters = Counter()
+        # Total seconds spent in each timed section
+        self.timers = defaultdict(float)
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def add_time(self, name, seconds):
+        self.timers[name] += seconds
+
+    def event(self, kind, **fields):
+        """
+        Sends a trace event to the sink, if there is one.
+
+        :param kind: Name of the event
+        :param fields: Data of the event
+        """
+        if self.sink is not None:
+            fields['event'] = kind
+            self.sink(fields)
+
+    def report(self):
+        """
+        :return: Dictionary of the counters and timers collected so far
+        """
+        return {'counters': dict(self.counters), 'timers': dict(self.timers)}
+
+
+def install(sink=None):
+    """
+    Starts collecting with a new Probe.
+
+    :param sink: @see Probe.sink
+    :return: The installed Probe
+    """
+    global probe
+    probe = Probe(sink)
+    return probe
+
+
+def uninstall():
+    """
+    Stops collecting.
+
+    :return: The Probe that was installed, None if there was none
+    """
+    global probe
+    removed, probe = probe, None
+    return removed
+
+
+class Timer:
+    """
+        Context manager adding the time spent in its block to a timer of a probe. Does nothing if the probe is None.
+    """
+
+    def __init__(self, active_probe, name):
+        self.probe = active_probe
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if self.probe is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.probe is not None:
+            self.probe.add_time(self.name, time.perf_counter() - self.start)
+
+
+class JsonLinesSink:
+    """
+        Sink writing every event as a line of JSON to a file. Values that aren't JSON types are written as strings.
+    """
+
+    def __init__(self, file):
+        self.file = file
+
+    def __call__(self, event):
+        self.file.write(json.dumps(event, default=str) + '\n')
+
+
+def print_sink(event):
+    """Sink printing events as readable text, used by the debug mode of course_scheduler_test.py."""
+    kind = event['event']
+    if kind == 'subgoal':
+        print()
+        print("Frontier")
+        print(event['frontier'])
+        print("Sub-goal chosen")
+        print(event['course'])
+    elif kind == 'try':
+        print("Trying Prerequisite")
+        print(event['prerequisites'])
+    elif kind == 'nogood':
+        print("Known to fail")
+    elif kind == 'backtrack':
+        print("Child returned false")
+    elif kind == 'backjump':
+        print("No other prerequisite can schedule " + str(event['conflict']))
+    elif kind == 'cycle':
+        print(str(event['course']) + " is needed below itself")
+    elif kind == 'unschedulable':
+        print("Couldn't schedule " + str(event['course']))
+        print(event['schedule'])
+    elif kind == 'scheduled':
+        print("New Schedule")
+        print(event['schedule'])
+    else:
+        print(event)
@@ -0,0 +1,198 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+
+    Long-lived local planning service. Clients connect over TCP and send one JSON request per line:
+
+        {"id": 1, "catalog": "data/CourseCatalogSpring2020.xlsx", "goals": [["CS", "major"]], "initial_state": []}
+
+    and get one JSON line back per request, in the order the plans are done:
+
+        {"id": 1, "plan": [[["CS", "1101"], ["Fall", "Frosh"], 3], ...]}  or  {"id": 1, "error": "..."}
+
+    "python3 planning_service.py" starts the service, see --help for its options.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog import compile_catalog
+from catalog_loader import DEFAULT_CACHE_DIR, file_hash, load_course_dict
+from course_scheduler import course_scheduler_anytime
+from schedule import Course
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Compiled catalogs of the current worker process by the hash of their workbook, kept for the life of the worker
+worker_catalogs = {}
+
+
+def plan_in_worker(catalog_path, catalog_hash, cache_dir, goal_conditions, initial_state, time_limit):
+    """
+    Plans one request in a worker process, compiling its catalog the first time the worker sees it.
+
+    :return: (plan, True if the time limit ran out before the search was done), @see course_scheduler_anytime
+    """
+    catalog = worker_catalogs.get(catalog_hash)
+    if catalog is None:
+        catalog = compile_catalog(load_course_dict(catalog_path, cache_dir, content_hash=catalog_hash))
+        worker_catalogs[catalog_hash] = catalog
+    result = course_scheduler_anytime(catalog, goal_conditions, initial_state, time_limit=time_limit)
+    return result.plan, result.budget_exceeded
+
+
+class PlanningService:
+    """
+        Plans requests on a pool of worker processes that keep their compiled catalogs warm. Requests for the same
+        plan that arrive while it is being planned wait for the same job instead of starting their own, and finished
+        plans are kept in an LRU cache keyed by (catalog hash, sorted goals, sorted initial state). Plans cut short by
+        the time limit are not cached.
+    """
+
+    def __init__(self, workers=None, cache_size=1024, time_limit=None, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        :param workers: Number of worker processes, defaults to the number of CPUs
+        :param cache_size: Number of plans kept in the cache
+        :param time_limit: Seconds a single plan can take, None for no limit (@see course_scheduler_anytime)
+        :param cache_dir: Directory of the workers' catalog snapshots, @see catalog_loader.load_course_dict
+        """
+        # Workers are spawned rather than forked, since a forked worker would keep the connections open at the time
+        # open as well and their clients would never see them closed
+        spawn = multiprocessing.get_context('spawn')
+        self.executor = ProcessPoolExecutor(workers or os.cpu_count() or 1, mp_context=spawn)
+        self.cache_size = cache_size
+        self.time_limit = time_limit
+        self.cache_dir = cache_dir
+        # Plans by request key, least recently used first
+        self.cache = OrderedDict()
+        # Tasks of the plans being planned by request key
+        self.in_flight = {}
+        # Content hash of each catalog path, with the (modification time, size) of the file it was computed for
+        self.catalog_hashes = {}
+        self.hits = 0
+        self.coalesced = 0
+        self.jobs = 0
+
+    async def catalog_hash(self, catalog_path):
+        """
+        :return: Hash of the catalog file, only read again when the file changes. The file is read on a thread of the
+         event loop's default executor so that the other clients are still answered meanwhile.
+        """
+        status = os.stat(catalog_path)
+        version = (status.st_mtime_ns, status.st_size)
+        known = self.catalog_hashes.get(catalog_path)
+        if known is None or known[0] != version:
+            known = (version, await asyncio.get_running_loop().run_in_executor(None, file_hash, catalog_path))
+            self.catalog_hashes[catalog_path] = known
+        return known[1]
+
+    async def plan(self, catalog_path, goal_conditions, initial_state):
+        """
+        :param catalog_path: Path to a catalog xlsx file
+        :param goal_conditions: @see course_scheduler
+        :param initial_state: @see course_scheduler
+        :return: Plan of the request, @see course_scheduler
+        """
+        key = (await self.catalog_hash(catalog_path), tuple(sorted(goal_conditions)), tuple(sorted(initial_state)))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return self.cache[key]
+
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.__run(key, catalog_path, goal_conditions, initial_state))
+            self.in_flight[key] = task
+        else:
+            self.coalesced += 1
+        # Shielded so that a client going away doesn't cancel the job for the other clients waiting on it
+        return await asyncio.shield(task)
+
+    async def __run(self, key, catalog_path, goal_conditions, initial_state):
+        self.jobs += 1
+        try:
+            plan, budget_exceeded = await asyncio.get_running_loop().run_in_executor(
+                self.executor, plan_in_worker, catalog_path, key[0], self.cache_dir, goal_conditions, initial_state,
+                self.time_limit)
+        finally:
+            del self.in_flight[key]
+        if not budget_exceeded:
+            self.cache[key] = plan
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return plan
+
+    async def handle_client(self, reader, writer):
+        """Answers every request line of a connection, planning them concurrently."""
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(self.__answer(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def __answer(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            goal_conditions = [Course(*course) for course in request['goals']]
+            initial_state = [Course(*course) for course in request.get('initial_state', [])]
+            plan = await self.plan(request['catalog'], goal_conditions, initial_state)
+            response = {'id': request_id, 'plan': plan}
+        except Exception as error:
+            response = {'id': request_id, 'error': repr(error)}
+        writer.write(json.dumps(response).encode() + b'\n')
+        await writer.drain()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, **service_options):
+    """
+    Runs the service until it is cancelled.
+
+    :param service_options: @see PlanningService
+    """
+    service = PlanningService(**service_options)
+    server = await asyncio.start_server(service.handle_client, host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serves course plans over JSON lines.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of CPUs')
+    parser.add_argument('--cache-size', type=int, default=1024, help='plans kept in the cache')
+    parser.add_argument('--time-limit', type=float, help='seconds a single plan can take')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, cache_size=args.cache_size,
+                          time_limit=args.time_limit))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+"""
+
+import heapq
+
+from catalog import bit_indices
+
+
+class PrereqAnalysis:
+    """
+        Static analysis of the prerequisite graph of a CompiledCatalog. Results are computed once per course, in
+        topological order (prerequisites before the courses that require them), the first time a course is reachable
+        from the roots given to self.analyze. Since the results only depend on the catalog, one analysis is shared by
+        every Schedule made from the same CompiledCatalog.
+
+        A prerequisite edge that closes a cycle is ignored when computing the values of the courses on the cycle, and
+        the course it points to is added to self.cyclic.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        size = len(catalog)
+        # Longest chain of prerequisites below each course, over all the alternatives. 0 if it has no prerequisites.
+        self.depth = [None] * size
+        # Bitset of every course that appears below each course in any alternative, not including the course itself.
+        self.closure = [None] * size
+        # Bitset of the courses a prerequisite edge closing a cycle points to, at least one course of every cycle
+        self.cyclic = 0
+
+    def analyze(self, roots):
+        """
+        Analyzes every course reachable from the given roots that hasn't been analyzed yet.
+
+        :param roots: Iterable of course ids
+        :return: Bitset of the roots and every course reachable from them
+        """
+        prereqs = self.catalog.prereqs
+        reachable = 0
+        for root in roots:
+            if self.closure[root] is None:
+                self.__visit(root, prereqs)
+            reachable |= 1 << root | self.closure[root]
+        return reachable
+
+    def __visit(self, root, prereqs):
+        """
+        Depth first post-order walk from root with an explicit stack, finishing each course after all of its
+        prerequisites.
+        """
+        active = 1 << root
+        stack = [(root, bit_indices(union_of(prereqs[root])))]
+        while stack:
+            course, children = stack[-1]
+            for child in children:
+                if self.closure[child] is not None:
+                    continue
+                if active >> child & 1:
+                    self.cyclic |= 1 << child
+                    continue
+                active |= 1 << child
+                stack.append((child, bit_indices(union_of(prereqs[child]))))
+                break
+            else:
+                stack.pop()
+                active &= ~(1 << course)
+                self.__finish(course, prereqs[course])
+
+    def __finish(self, course, possible_prerequisites):
+        """Computes the values of a course whose (non-cyclic) prerequisites are all finished."""
+        union = union_of(possible_prerequisites)
+        children = [child for child in bit_indices(union) if self.closure[child] is not None]
+
+        closure = union
+        for child in children:
+            closure |= self.closure[child]
+        self.closure[course] = closure
+        self.depth[course] = max((self.depth[child] + 1 for child in children), default=0)
+
+
+def post_order(catalog, roots, stop=0):
+    """
+    Iterates over the courses reachable from the given roots through any prerequisite alternative, each course after
+    all of its prerequisites. Prerequisite edges that close a cycle are skipped.
+
+    :param catalog: CompiledCatalog
+    :param roots: Iterable of course ids
+    :param stop: Bitset of courses that are neither returned nor looked into
+    :return: Generator of course ids
+    """
+    prereqs = catalog.prereqs
+    seen = stop
+    for root in roots:
+        if seen >> root & 1:
+            continue
+        seen |= 1 << root
+        stack = [(root, bit_indices(union_of(prereqs[root]) & ~seen))]
+        while stack:
+            course, children = stack[-1]
+            for child in children:
+                if seen >> child & 1:
+                    continue
+                seen |= 1 << child
+                stack.append((child, bit_indices(union_of(prereqs[child]) & ~seen)))
+                break
+            else:
+                stack.pop()
+                yield course
+
+
+def union_of(possible_prerequisites):
+    """
+    :param possible_prerequisites: Prerequisite alternatives of a course, each a bitset of course ids
+    :return: Bitset of the courses in any of the alternatives
+    """
+    union = 0
+    for prerequisites in possible_prerequisites:
+        union |= prerequisites
+    return union
+
+
+def mandatory_courses(catalog, roots, initial_mask):
+    """
+    Finds, for every course reachable from the roots, the courses that any way of completing it has to schedule: the
+    course itself and the courses required by all of its prerequisite alternatives, stopping at courses in the initial
+    state. Since every plan has to schedule them, their count is a lower bound on the courses a plan needs.
+
+    :param catalog: CompiledCatalog
+    :param roots: Iterable of course ids
+    :param initial_mask: Bitset of the courses already taken
+    :return: Dictionary of course id to the bitset of its mandatory courses, 0 for courses already taken
+    """
+    mandatory = {course: 0 for course in bit_indices(initial_mask)}
+    for course in post_order(catalog, roots, initial_mask):
+        required = None
+        for prerequisites in catalog.prereqs[course]:
+            alternative = 0
+            for prereq in bit_indices(prerequisites):
+                alternative |= mandatory.get(prereq, 0)
+            required = alternative if required is None else required & alternative
+        mandatory[course] = 1 << course | (required or 0)
+    return mandatory
+
+
+def earliest_semesters(catalog, roots, initial_mask):
+    """
+    Finds the earliest semester each course reachable from the roots could be scheduled in, ignoring credit limits.
+    Courses already taken are at semester 0, a credited course comes at least a semester after its prerequisites, a
+    high-level course can be completed in the same semester as its prerequisites, and each course is moved on to the
+    next semester when it isn't offered in that term. Values are settled smallest first, the way Dijkstra's algorithm
+    settles distances, so every alternative is only looked at once its last prerequisite is settled, and courses that
+    can never be completed (e.g. because of a cycle or because they are never offered) are left out.
+
+    :param catalog: CompiledCatalog
+    :param roots: Iterable of course ids
+    :param initial_mask: Bitset of the courses already taken
+    :return: Dictionary of course id to its earliest semester, only for courses that can be completed
+    """
+    prereqs = catalog.prereqs
+    courses = list(post_order(catalog, roots, initial_mask))
+    earliest = {course: 0 for course in bit_indices(initial_mask)}
+
+    # For every alternative, the number of its prerequisites not settled yet and the latest semester among the
+    # settled ones.
+    remaining = {}
+    latest = {}
+    # Alternatives (course, index) that each course is a prerequisite in
+    dependents = {}
+    queue = []
+
+    def push(course, semester):
+        semester = earliest_after(catalog, course, semester)
+        if semester is not None:
+            heapq.heappush(queue, (semester, course))
+
+    for course in courses:
+        if not prereqs[course]:
+            push(course, 0)
+        for index, prerequisites in enumerate(prereqs[course]):
+            remaining[course, index] = 0
+            latest[course, index] = 0
+            for prereq in bit_indices(prerequisites):
+                if prereq in earliest:
+                    continue
+                remaining[course, index] += 1
+                dependents.setdefault(prereq, []).append((course, index))
+            if not remaining[course, index]:
+                push(course, 0)
+
+    while queue:
+        semester, course = heapq.heappop(queue)
+        if course in earliest:
+            continue
+        earliest[course] = semester
+        for dependent, index in dependents.get(course, ()):
+            remaining[dependent, index] -= 1
+            latest[dependent, index] = max(latest[dependent, index], semester)
+            if not remaining[dependent, index] and dependent not in earliest:
+                push(dependent, latest[dependent, index])
+    return earliest
+
+
+def earliest_after(catalog, course, semester):
+    """
+    :return: Earliest semester a course can be scheduled in when its prerequisites are done by the given semester,
+     in a term it is offered in (semester % 2 is 1 in the Fall). None if it is never offered.
+    """
+    terms = catalog.terms[course]
+    if not terms:
+        return None
+    semester = semester + 1 if catalog.credits[course] else max(semester, 1)
+    return semester if terms >> semester % 2 & 1 else semester + 1
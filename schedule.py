@@ -3,9 +3,15 @@
     Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
 """
 
+import bisect
+import heapq
 from collections import namedtuple
 from copy import deepcopy
-from tree import Tree
+
+import instrumentation
+from catalog import bit_indices, compile_catalog
+from course_heuristic import course_heuristic
+from prereq_analysis import PrereqAnalysis, earliest_semesters, mandatory_courses
 
 Course = namedtuple('Course', 'program, designation')
 CourseInfo = namedtuple('CourseInfo', 'credits, terms, prereqs')
@@ -13,46 +19,10 @@ course_translation = {1: 'Frosh', 3: 'Soph', 5: 'Junior', 7: 'Senior'}
 season_translation = {0: 'Spring', 1: 'Fall'}
 MAX_CREDITS = 18
 MIN_CREDITS = 12
-
-
-def flatten(list_of_lists):
-    """
-    Flattens a list of lists and then returns it as a set.
-
-    :param list_of_lists: List ot flatten
-    :return: A set containing every element in the given list_of_lists
-    """
-    flatten_list = set()
-    for inner_list in list_of_lists:
-        for element in inner_list:
-            flatten_list.add(element)
-    return flatten_list
-
-
-def find_elective_groups(catalog):
-    """
-    Find and store electives that share prerequisites. This is a special case of high-level requirements. Since in
-    normal credited courses one course can fulfill unlimited requirements but in electives one course can fulfill
-    one requirement in the same group.
-
-    :param catalog: Dictionary holding all Course (key) to CourseInfo (value) information. See above for definition of
-     each.
-    :return: List of groups of electives that share the same prerequisites. Ex group: [(CS, open1), (CS, open2)...]
-    """
-    reverse_catalog = {}
-    for key in catalog:
-        if catalog[key].credits == '0':
-            if catalog[key] in reverse_catalog:
-                reverse_catalog[catalog[key]].append(key)
-            else:
-                reverse_catalog[catalog[key]] = [key]
-
-    groups = []
-    for key in reverse_catalog:
-        if len(reverse_catalog[key]) > 1:
-            groups.append(reverse_catalog[key])
-
-    return groups
+NUM_SEMESTERS = 8
+# Kinds of changes recorded in Schedule.trail
+SCHEDULED = 0
+ELECTIVE_ADDED = 1
 
 
 def get_scheduled_term(semester):
@@ -67,6 +37,20 @@ def get_scheduled_term(semester):
     return season, year
 
 
+def get_scheduled_semester(term):
+    """
+    Translate the String representation of a term back to its index, the inverse of get_scheduled_term
+
+    :param term: (Fall/Spring, Frosh/Soph/Junior/Senior)
+    :return: Integer number of semester, 1 to 8
+    """
+    season, year = term
+    for semester, name in course_translation.items():
+        if name == year:
+            return semester if season == season_translation[1] else semester + 1
+    raise ValueError(str(term) + " isn't a valid term")
+
+
 class Schedule:
     """
         A class that abstracts any detail/functionality about the scheduling problem.
@@ -74,56 +58,78 @@ class Schedule:
     """
 
     def __init__(self, course_catalog, initial_state, goal_conditions):
+        # Integer-indexed course catalog (@see catalog.py). Courses are referred to by their ids from here on.
+        self.catalog = compile_catalog(course_catalog)
         # Course catalog given in course_definitions used to lookup course information
-        self.dict = course_catalog
+        self.dict = self.catalog.descriptions
         # Groups of high-level elective groups that must be satisfied by different courses.
-        self.elective_groups = find_elective_groups(self.dict)
+        self.elective_groups = self.catalog.elective_groups
+        if self.catalog.analysis is None:
+            self.catalog.analysis = PrereqAnalysis(self.catalog)
+        self.analysis = self.catalog.analysis
         self.heuristic_dictionary = {}
+        # Heuristic value of each course (@see course_heuristic.py), calculated once by build_heuristic_dictionary
+        self.heuristic_values = [0] * len(self.catalog)
         self.goal_conditions = goal_conditions
-        self.build_prereq_tree(goal_conditions)
-        self.max_semester = 8
-
-
-        # List of sets of courses scheduled for self.elective_groups
-        self.electives_taken = [set() for i in range(len(self.elective_groups))]
-        # All the courses scheduled so far. Stored so that we don't have to union semester sets every time.
-        self.courses_taken = set(initial_state)
+        # Course ids of goal_conditions
+        self.goals = [self.catalog.ids[course] for course in goal_conditions]
+        # Programs of the goals, which the heuristic favors
+        self.goal_programs = frozenset(course[0] for course in goal_conditions)
+        self.build_heuristic_dictionary(self.goals)
+        self.max_semester = NUM_SEMESTERS
+
+        initial_mask = self.catalog.to_mask(course for course in initial_state if course in self.catalog.ids)
+        # Courses every plan has to schedule and earliest possible semesters of the courses the goals need, used as
+        # lower bounds (@see prereq_analysis.py)
+        self.mandatory = mandatory_courses(self.catalog, self.goals, initial_mask)
+        self.earliest = earliest_semesters(self.catalog, self.goals, initial_mask)
+
+        # List of bitsets of courses scheduled for self.elective_groups
+        self.electives_taken = [0] * len(self.elective_groups)
+        # Bitset of all the courses scheduled so far. Stored so that we don't have to union semester sets every time.
+        self.courses_taken = initial_mask
         # List of sets of courses scheduled for each semester. 0 is initial state, 1 to 8 (inclusive) is Fall Frosh
         # to Spring Senior.
-        self.scheduled = {i: set() for i in range(self.max_semester + 1)}
-
-        self.scheduled[0] = set(initial_state)
+        self.scheduled = {i: set() for i in range(NUM_SEMESTERS + 1)}
+
+        self.scheduled[0] = set(bit_indices(initial_mask))
+        # Total credits scheduled for each semester, kept up to date so that they are never summed up again.
+        self.credits = [0] * (NUM_SEMESTERS + 1)
+        self.credits[0] = sum(self.get_credits(course) for course in self.scheduled[0])
+        # Bitset of the courses scheduled in semesters 0 to i (inclusive) for each semester i.
+        self.taken_by = [initial_mask] * (NUM_SEMESTERS + 1)
+        # Undo log of every change made to the schedule, so that the search can backtrack to a mark by undoing only
+        # the changes made after it. Entries are (SCHEDULED, course, semester) or (ELECTIVE_ADDED, group index,
+        # previous electives_taken bitset of the group).
+        self.trail = []
 
     def get_prereqs(self, course):
         """
-        :param course: Course to look up
-        :return: Requirement list for the course
+        :param course: Course id to look up
+        :return: Requirement list for the course, each requirement is a bitset of course ids
         """
-        return self.dict[course].prereqs
+        return self.catalog.prereqs[course]
 
     def get_credits(self, course):
         """
-        :param course: Course to look up
+        :param course: Course id to look up
         :return: Number of credits for the course
         """
-        return int(self.dict[course].credits)
+        return self.catalog.credits[course]
 
     def is_high_level(self, course):
         """
-        :param course: Course to look up
+        :param course: Course id to look up
         :return: True if course is a high-level requirement (if its credit is 0), false otherwise.
         """
         return self.get_credits(course) == 0
 
     def is_elective(self, course):
         """
-        :param course: Course to look up
+        :param course: Course id to look up
         :return: True if course belongs to a group of electives, false otherwise.
         """
-        for group in self.elective_groups:
-            if course in group:
-                return True
-        return False
+        return self.catalog.elective_group_of[course] is not None
 
     def is_program_in_goal(self, program):
         """
@@ -132,39 +138,90 @@ class Schedule:
         :param program: Program to check
         :return: True if it is, false otherwise
         """
-        for goal in self.goal_conditions:
-            if program == goal[0]:
-                return True
-        return False
+        return program in self.goal_programs
 
     def num_of_courses_scheduled(self):
-        return len(self.courses_taken)
+        return bin(self.courses_taken).count('1')
 
-    def schedule(self, course, chosen_prerequisites=None):
+    def min_courses_scheduled(self):
+        """
+        :return: Lower bound on num_of_courses_scheduled for any schedule that fulfills the goals
+        """
+        required = self.taken_by[0]
+        for goal in self.goals:
+            required |= self.mandatory[goal]
+        return bin(required).count('1')
+
+    def min_semesters(self):
+        """
+        :return: Lower bound on the max_semester needed to fulfill the goals, None if they can never be fulfilled
+        """
+        if any(goal not in self.earliest for goal in self.goals):
+            return None
+        return max((self.earliest[goal] for goal in self.goals), default=0)
+
+    def schedule(self, course, chosen_prerequisites=0):
         """
         Attempts to schedule the class in the earliest semester possible. A semester has to have less than 18 credits
         with this class scheduled, course needs to be offered in that semester, course shouldn't have been scheduled and
         the requirement for this course must have been scheduled before the semester if it's a course with credit or
         requirements can be completed during the semester if it's a high-level course.
 
-        :param chosen_prerequisites: The prerequisite scheduled to fulfill the requirement for this course
-        :param course: Course to schedule
+        :param chosen_prerequisites: Bitset of the prerequisites scheduled to fulfill the requirement for this course
+        :param course: Course id to schedule
         :return: True if course is scheduled or False if it can't be scheduled
         """
-        if course in self.courses_taken:
+        if self.courses_taken >> course & 1:
             return True
 
-        for i in range(1, self.max_semester + 1):
+        # Semesters before the earliest one the course could be done in or in terms it isn't offered in are skipped
+        probe = instrumentation.probe
+        terms = self.catalog.terms[course]
+        for i in range(self.earliest.get(course, 1), self.max_semester + 1):
+            if not terms >> i % 2 & 1:
+                continue
+            if probe is not None:
+                probe.count('schedule_attempts.' + str(i))
             if self.schedule_in(course, i, chosen_prerequisites):
                 return True
         return False
 
-    def schedule_in(self, course, semester, chosen_prerequisites=None):
+    def fitting_semesters(self, course):
+        """
+        Finds every semester self.schedule_in could schedule a course in right now. A high-level course only gets the
+        earliest one, since completing it later never leaves more room or satisfies more requirements.
+
+        :param course: Course id that isn't scheduled
+        :return: List of semesters, earliest first, the first one being where self.schedule would schedule the course
+        """
+        terms = self.catalog.terms[course]
+        semesters = []
+        for i in range(self.earliest.get(course, 1), self.max_semester + 1):
+            if terms >> i % 2 & 1 and self.__can_schedule(course, i) and self.__requirements_satisfied(course, i):
+                semesters.append(i)
+                if self.is_high_level(course):
+                    break
+        return semesters
+
+    def is_blocked(self, course):
+        """
+        Checks if a course is kept out of every semester it could be scheduled in by the courses already there, i.e.
+        each semester from the earliest one it could be done in to max_semester either doesn't offer it or doesn't have
+        room for its credits. Scheduling more courses never unblocks a course, only undoing some of them can.
+
+        :param course: Course id that isn't scheduled
+        :return: True if the course can't be scheduled whatever prerequisites are chosen for it
+        """
+        credits = self.get_credits(course)
+        terms = self.catalog.terms[course]
+        return all(not terms >> i % 2 & 1 or self.credits[i] + credits > MAX_CREDITS
+                   for i in range(self.earliest.get(course, NUM_SEMESTERS + 1), self.max_semester + 1))
+
+    def schedule_in(self, course, semester, chosen_prerequisites=0):
         """Tries to schedule a course in a particular semester."""
 
         if self.__can_schedule(course, semester) and self.__requirements_satisfied(course, semester):
-            self.scheduled[semester].add(course)
-            self.courses_taken.add(course)
+            self.__place(course, semester)
 
             """ 
             If the course we scheduled is a high-level elective requirement, then we want to store the course 
@@ -175,29 +232,72 @@ class Schedule:
             return True
         return False
 
+    def __place(self, course, semester):
+        """Adds a course to a semester without checking anything."""
+        self.scheduled[semester].add(course)
+        self.courses_taken |= 1 << course
+        self.credits[semester] += self.get_credits(course)
+        for i in range(semester, NUM_SEMESTERS + 1):
+            self.taken_by[i] |= 1 << course
+        self.trail.append((SCHEDULED, course, semester))
+
+    def restore(self, plan):
+        """
+        Resets the schedule to the initial state and schedules the courses of a CompactPlan made from a schedule with
+        the same catalog and initial state, without checking them again. Electives are not told which courses they
+        used, so the schedule is only meant for get_plan afterwards.
+
+        :param plan: CompactPlan (@see compact_plan.py)
+        """
+        self.undo(0)
+        for course, semester in plan.placements():
+            self.__place(course, semester)
+
+    def schedule_placements(self, placements):
+        """
+        Schedules courses in the semesters they are given with, skipping the ones that are already taken or can't be
+        scheduled there anymore. Courses are scheduled in semester order and, within a semester, prerequisites first.
+        A course is kept by the same rule the search schedules it with, which only needs one of its alternatives to be
+        done, and an elective is recorded as using the courses of that alternative that its group doesn't use yet.
+
+        :param placements: Iterable of (course id, semester)
+        :return: Number of courses scheduled
+        """
+        placements = [(course, semester) for course, semester in placements if semester <= self.max_semester]
+        self.analysis.analyze(course for course, _ in placements)
+        depth = self.analysis.depth
+
+        kept = 0
+        for course, semester in sorted(placements, key=lambda placement: (placement[1], depth[placement[0]])):
+            chosen_prerequisites = 0
+            if self.is_elective(course):
+                used = self.electives_taken[self.catalog.elective_group_of[course]]
+                courses_taken = self.taken_by[semester]
+                chosen_prerequisites = next((prerequisites for prerequisites in self.get_prereqs(course)
+                                             if not prerequisites & ~courses_taken), 0) & ~used
+            if self.schedule_in(course, semester, chosen_prerequisites):
+                kept += 1
+        return kept
+
     def add_elective_course(self, elective, courses):
         """
 
         :param elective: The high-level elective requirement course is meant to fulfill.
-        :param courses: The course being scheduled.
+        :param courses: Bitset of the courses being scheduled.
         :return: Error if given elective parameter doesn't exist in catalog as an elective
         """
-        for index, group in enumerate(self.elective_groups):
-            if elective in group:
-                for course in courses:
-                    self.electives_taken[index].add(course)
-                return
-        raise NameError(str(elective) + " couldn't be found in any elective groups")
+        index = self.catalog.elective_group_of[elective]
+        if index is None:
+            raise NameError(str(self.catalog.courses[elective]) + " couldn't be found in any elective groups")
+        self.trail.append((ELECTIVE_ADDED, index, self.electives_taken[index]))
+        self.electives_taken[index] |= courses
 
     def get_total_credits(self, semester):
         """
         :param semester: Integer representation of a semester.
         :return: Return the total number of credits scheduled for a semester.
         """
-        total = 0
-        for course in self.scheduled[semester]:
-            total += self.get_credits(course)
-        return total
+        return self.credits[semester]
 
     def get_plan(self):
         """
@@ -210,18 +310,18 @@ class Schedule:
 
         for semester in range(1, self.max_semester + 1):
             for course in self.scheduled[semester]:
-                plan.append((course, get_scheduled_term(semester), self.get_credits(course)))
+                plan.append((self.catalog.courses[course], get_scheduled_term(semester), self.get_credits(course)))
         return plan
 
     def __is_course_offered(self, course, season):
         """
         Checks if the course can be scheduled in a given semester
 
-        :param course: Course to check
+        :param course: Course id to check
         :param season: 0 for 'Spring', 1 for 'Fall'
         :return: True if course can be scheduled, false if it can't
         """
-        return season_translation[season] in self.dict[course].terms
+        return self.catalog.terms[course] >> season & 1
 
     def __requirements_satisfied(self, course, semester):
         """
@@ -232,16 +332,14 @@ class Schedule:
         :return: Returns if all the prerequisites for a course is satisfied by the given semester.
         """
         possible_prerequisites = self.get_prereqs(course)
-        courses_taken = self.scheduled[0]
 
         if not possible_prerequisites:
             return True
 
-        for i in range(1, semester + (1 if self.get_credits(course) == 0 else 0)):
-            courses_taken = courses_taken | self.scheduled[i]
+        courses_taken = self.taken_by[semester if self.get_credits(course) == 0 else semester - 1]
 
         for prerequisites in possible_prerequisites:
-            if set(prerequisites).issubset(courses_taken):
+            if not prerequisites & ~courses_taken:
                 return True
         return False
 
@@ -256,47 +354,87 @@ class Schedule:
         :return: True if all above conditions are met, False otherwise
         """
         return self.get_total_credits(semester) + self.get_credits(course) <= MAX_CREDITS \
-               and course not in self.courses_taken and self.__is_course_offered(course, semester % 2)
+               and not self.courses_taken >> course & 1 and self.__is_course_offered(course, semester % 2)
+
+    def mark(self):
+        """
+        Marks the current state of the schedule so that it can be restored with self.undo. Unlike self.copy this
+        doesn't copy anything.
+
+        :return: Position in the undo log to pass to self.undo
+        """
+        return len(self.trail)
+
+    def undo(self, mark):
+        """
+        Undoes every change made after the given mark, in reverse order.
+
+        :param mark: Position in the undo log returned by self.mark
+        """
+        while len(self.trail) > mark:
+            change = self.trail.pop()
+            if change[0] == SCHEDULED:
+                _, course, semester = change
+                self.scheduled[semester].discard(course)
+                self.courses_taken &= ~(1 << course)
+                self.credits[semester] -= self.get_credits(course)
+                for i in range(semester, NUM_SEMESTERS + 1):
+                    self.taken_by[i] &= ~(1 << course)
+            else:
+                _, index, electives = change
+                self.electives_taken[index] = electives
+
+    def placements_since(self, mark):
+        """
+        Lists the courses scheduled after a mark so that they can be scheduled again with self.schedule_in, from this
+        state or another one.
+
+        :param mark: Position in the undo log returned by self.mark
+        :return: Tuple of (course id, semester, chosen prerequisites) in the order they were scheduled
+        """
+        changes = self.trail[mark:]
+        placements = []
+        for position, change in enumerate(changes):
+            if change[0] == SCHEDULED:
+                placements.append((change[1], change[2], 0))
+                continue
+            # The prerequisites chosen for the elective are what its group gained, which is the bitset the next change
+            # of the group starts from or the current one if there is none
+            _, index, electives = change
+            after = next((later[2] for later in changes[position + 1:] if later[0] == ELECTIVE_ADDED and
+                          later[1] == index), self.electives_taken[index])
+            course, semester, _ = placements[-1]
+            placements[-1] = (course, semester, after & ~electives)
+        return tuple(placements)
 
     def copy(self):
         """
         Deep copies all non-constant objects in this class to save space while copying this class
-        :return: A copy of electives_taken, courses_taken, scheduled
+        :return: A copy of electives_taken, courses_taken, scheduled, credits, taken_by, trail
         """
-        return deepcopy(self.electives_taken), deepcopy(self.courses_taken), deepcopy(self.scheduled)
+        return deepcopy(self.electives_taken), self.courses_taken, deepcopy(self.scheduled), list(self.credits), \
+            list(self.taken_by), list(self.trail)
 
     def assign(self, copy):
         """
-        Assigns back electives_taken, courses_taken, scheduled copy objects created with self.copy function.
-        :return: A copy of electives_taken, courses_taken, scheduled
+        Assigns back electives_taken, courses_taken, scheduled, credits, taken_by, trail copy objects created with
+        self.copy function.
         """
-        self.electives_taken, self.courses_taken, self.scheduled = copy
+        self.electives_taken, self.courses_taken, self.scheduled, self.credits, self.taken_by, self.trail = copy
 
-    def build_prereq_tree(self, goal_conditions):
+    def build_heuristic_dictionary(self, goal_conditions):
         """
-        Builds a tree of courses and their prerequisites to pre-calculate the depths of paths in the search tree.
+        Pre-calculates the depths of paths in the search tree for the goals and every course they require, using the
+        prerequisite analysis of the catalog (@see prereq_analysis.py), and the heuristic values of those courses.
 
-        :param goal_conditions: @see course_scheduler(course_descriptions, goal_conditions, initial_state)
-        :return: Root of the tree
+        :param goal_conditions: List of course ids, @see course_scheduler(course_descriptions, goal_conditions,
+         initial_state)
         """
-        for course in goal_conditions:
-            prereqs = self.get_prereqs(course)
-            root = Tree(course)
-            prereqSet = flatten(prereqs)
-            if prereqSet == set():
-                root.max_depth = 0
-                self.heuristic_dictionary[course] = root.max_depth
-                return root
-            else:
-                depths = []
-                for prereq in prereqSet:
-                    toAdd = self.build_prereq_tree([prereq])
-                    root.add_child(toAdd)
-                    self.heuristic_dictionary[prereq] = toAdd.max_depth
-                    depths.append(toAdd.max_depth + 1)
-                root.max_depth = max(depths)
-
-                return root
+        depth = self.analysis.depth
+        for course in bit_indices(self.analysis.analyze(goal_conditions)):
+            self.heuristic_dictionary[course] = depth[course]
+        for course in self.heuristic_dictionary:
+            self.heuristic_values[course] = course_heuristic(self, course)
 
     def fill_semesters(self):
         """
@@ -314,15 +452,20 @@ class Schedule:
             else:
                 break
 
-        # for each semester that must be filled, try to add all courses as long as we need to add more
+        # for each semester that must be filled, add the first available course in the catalog as long as we need to
+        # add more
+        probe = instrumentation.probe
+        candidates = CandidatePool(self)
         for sem in range(1, stop_semester):
-            added_course = True  # added_course is false if we can't add anything else to this semester
-            while self.get_total_credits(sem) < MIN_CREDITS and added_course:
-                added_course = False
-                for course in self.dict.keys():
-                    if self.schedule_in(course, sem):
-                        added_course = True
-                        break
+            candidates.start_semester(sem)
+            while self.get_total_credits(sem) < MIN_CREDITS:
+                if probe is not None:
+                    probe.count('fill_passes')
+                course = candidates.pop(sem % 2, MAX_CREDITS - self.get_total_credits(sem))
+                if course is None:
+                    break  # we can't add anything else to this semester
+                if self.schedule_in(course, sem):
+                    candidates.course_added(course, sem)
 
     def __str__(self):
         """
@@ -334,10 +477,95 @@ class Schedule:
 
         for i in range(1, self.max_semester + 1):
             schedule_str += str(get_scheduled_term(i)) + ": "
-            schedule_str += str(list(filter(lambda course: not self.is_high_level(course), self.scheduled[i])))
+            schedule_str += str([self.catalog.courses[course] for course in self.scheduled[i]
+                                 if not self.is_high_level(course)])
             schedule_str += " Credits: " + str(self.get_total_credits(i))
             schedule_str += '\n\tDone with ' + str(
-                list(filter(lambda course: self.is_high_level(course), self.scheduled[i])))
+                [self.catalog.courses[course] for course in self.scheduled[i] if self.is_high_level(course)])
             schedule_str += '\n'
 
         return schedule_str
+
+
+class CandidatePool:
+    """
+        Index of the courses fill_semesters can add, so that filling a semester doesn't look through the whole catalog
+        for every course it adds. A course enters the pool once it isn't taken and the prerequisites of one of its
+        alternatives are done, and then stays in it since courses are only added while filling. Courses in the pool
+        are kept in a heap of ids for each season they are offered in and each credit value, so the first course in
+        catalog order that fits in a semester is at the top of one of the heaps.
+
+        A course is only checked again when one of its prerequisites gets done by the semester being filled, which
+        is found through CompiledCatalog.dependents.
+    """
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+        catalog = schedule.catalog
+        # Bitset of the courses in the pool
+        self.ready = 0
+        # Heap of course ids for each (season, credits)
+        self.heaps = {}
+        # Sorted credit values that have a heap for each season
+        self.credit_values = ([], [])
+
+        for course in range(len(catalog)):
+            if not catalog.prereqs[course]:
+                self.__add_if_ready(course, 1)
+
+    def start_semester(self, semester):
+        """
+        Adds the courses that become available in a semester: credited courses whose prerequisites were done by the
+        semester before and high-level courses whose prerequisites are done by this one.
+        """
+        for done_semester in (semester - 1, semester):
+            for course in self.schedule.scheduled[done_semester]:
+                self.course_added(course, semester)
+
+    def course_added(self, course, semester):
+        """
+        Adds the courses that became available by a course being scheduled, when filling the given semester.
+        """
+        for dependent in self.schedule.catalog.dependents[course]:
+            self.__add_if_ready(dependent, semester)
+
+    def pop(self, season, max_credits):
+        """
+        Removes and returns the first course in catalog order offered in the season with at most max_credits.
+
+        :param season: 0 for 'Spring', 1 for 'Fall'
+        :param max_credits: Credits left in the semester
+        :return: Course id, None if there is no such course
+        """
+        best = None
+        for credits in self.credit_values[season]:
+            if credits > max_credits:
+                break
+            heap = self.heaps[season, credits]
+            while heap and self.schedule.courses_taken >> heap[0] & 1:
+                heapq.heappop(heap)
+            if heap and (best is None or heap[0] < best[0]):
+                best = (heap[0], heap)
+        if best is None:
+            return None
+        return heapq.heappop(best[1])
+
+    def __add_if_ready(self, course, semester):
+        schedule = self.schedule
+        if self.ready >> course & 1 or schedule.courses_taken >> course & 1:
+            return
+        possible_prerequisites = schedule.catalog.prereqs[course]
+        credits = schedule.get_credits(course)
+        if possible_prerequisites:
+            courses_taken = schedule.taken_by[semester if credits == 0 else semester - 1]
+            if all(prerequisites & ~courses_taken for prerequisites in possible_prerequisites):
+                return
+
+        self.ready |= 1 << course
+        terms = schedule.catalog.terms[course]
+        for season in (0, 1):
+            if terms >> season & 1:
+                if (season, credits) not in self.heaps:
+                    self.heaps[season, credits] = []
+                    bisect.insort(self.credit_values[season], credits)
+                heapq.heappush(self.heaps[season, credits], course)
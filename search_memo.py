@@ -0,0 +1,160 @@
+"""
+    Team Number: 10
+    Members: Noah Popham, Arda Turkmen, Mark Weinstein, Harry Wilson
+"""
+
+from collections import OrderedDict
+
+from catalog import bit_indices
+
+
+def subgoal_signature(schedule, prerequisites):
+    """
+    Describes everything the search of a set of prerequisites depends on, so that two searches with the same
+    signature have the same outcome: the prerequisites, the number of semesters, when each course the prerequisites
+    could need was taken, the credits already used in each semester and the programs of the goals (which order the
+    search through the heuristic).
+
+    :param schedule: @see schedule.py
+    :param prerequisites: Bitset of the courses to be searched for
+    :return: Hashable signature
+    """
+    closure = schedule.analysis.closure
+    relevant = prerequisites
+    for course in bit_indices(prerequisites):
+        relevant |= closure[course]
+
+    semesters = range(schedule.max_semester + 1)
+    return (prerequisites, schedule.max_semester, schedule.goal_programs,
+            tuple(schedule.taken_by[semester] & relevant for semester in semesters),
+            tuple(schedule.credits[semester] for semester in semesters))
+
+
+class NogoodTable:
+    """
+        Bounded table of subgoal signatures (@see subgoal_signature) whose search is known to fail. The least recently
+        used signature is evicted when the table is full. A table can be shared by many searches as long as they use
+        the same catalog.
+    """
+
+    def __init__(self, max_entries=1 << 16):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def is_nogood(self, signature):
+        """
+        :param signature: @see subgoal_signature
+        :return: True if a search with this signature already failed
+        """
+        if signature in self.entries:
+            self.entries.move_to_end(signature)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, signature):
+        """
+        Records that the search with this signature failed.
+
+        :param signature: @see subgoal_signature
+        """
+        self.entries[signature] = True
+        self.entries.move_to_end(signature)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+def subplan_key(schedule, prerequisites):
+    """
+    Describes the part of the state a sub-plan of a set of prerequisites is made from: the prerequisites, the number
+    of semesters, the programs of the goals and when each course the prerequisites could need was taken. Unlike
+    subgoal_signature the credits of the semesters aren't part of it, so the same sub-plan is found for every state
+    that took the same relevant courses, and has to be checked against the credits when it is used.
+
+    :param schedule: @see schedule.py
+    :param prerequisites: Bitset of the courses to be searched for
+    :return: Hashable key
+    """
+    closure = schedule.analysis.closure
+    relevant = prerequisites
+    for course in bit_indices(prerequisites):
+        relevant |= closure[course]
+    return (prerequisites, schedule.max_semester, schedule.goal_programs,
+            tuple(schedule.taken_by[semester] & relevant for semester in range(schedule.max_semester + 1)))
+
+
+class SubplanCache:
+    """
+        Bounded cache of the courses a successful search of a set of prerequisites scheduled (@see
+        Schedule.placements_since), by subplan_key. The least recently used sub-plans are evicted when there are more
+        than max_entries of them or they hold more than max_placements courses in total. A cache can be shared by many
+        searches as long as they use the same catalog.
+    """
+
+    def __init__(self, max_entries=1 << 14, max_placements=1 << 18):
+        self.max_entries = max_entries
+        self.max_placements = max_placements
+        self.entries = OrderedDict()
+        # Number of courses held by all the entries
+        self.placements = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        :param key: @see subplan_key
+        :return: Placements of the sub-plan, None if there is none
+        """
+        placements = self.entries.get(key)
+        if placements is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return placements
+
+    def add(self, key, placements):
+        """
+        Records the sub-plan found for a key, replacing the one it had.
+
+        :param key: @see subplan_key
+        :param placements: @see Schedule.placements_since
+        """
+        if len(placements) > self.max_placements:
+            return
+        self.__discard(key)
+        self.entries[key] = placements
+        self.placements += len(placements)
+        while len(self.entries) > self.max_entries or self.placements > self.max_placements:
+            _, evicted = self.entries.popitem(last=False)
+            self.placements -= len(evicted)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        Drops the sub-plan of a key, e.g. when it doesn't fit in the credits of the state it was tried in.
+
+        :param key: @see subplan_key
+        """
+        if self.__discard(key):
+            self.invalidations += 1
+
+    def __discard(self, key):
+        placements = self.entries.pop(key, None)
+        if placements is None:
+            return False
+        self.placements -= len(placements)
+        return True